@@ -1,5 +1,9 @@
 # client/__init__.py
 
-from .executor import execute_plan
+from .executor import (
+    execute_plan, execute_plan_async, execute_batch, stream_plan,
+    submit_job, get_job, get_job_result, cancel_job, wait_job,
+)
 
-__all__ = ["make_plan", "execute_plan"]
+__all__ = ["make_plan", "execute_plan", "execute_plan_async", "execute_batch", "stream_plan",
+           "submit_job", "get_job", "get_job_result", "cancel_job", "wait_job"]
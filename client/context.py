@@ -0,0 +1,113 @@
+# 도구 실행 결과를 컨텍스트에 모으고, 다음 도구 호출 인자로 주입
+import os
+import json
+from typing import Any, Dict, List
+
+# 각 도구가 컨텍스트에서 어떤 인자가 필요한지 정의
+TOOL_CONTEXT_MAP: Dict[str, List[str]] = {
+    "summarize_text": ["text_to_summarize"],
+    "generate_feedback": ["month", "todos", "kpi_summary", "template"],
+    "export_to_notion": ["month", "content"],
+    "export_report": ["month", "content"],
+    # get_today / parse_pdf 등은 인자 불필요 또는 실행 결과로 연결
+    # list_todos는 조회 범위를 모델이 정하도록 주입하지 않습니다. (이전 결과의 month로 조용히 좁혀지지 않도록)
+}
+
+def _merge_tool_result_into_context(context: Dict[str, Any], result_data: Dict[str, Any]) -> None:
+    """
+    제네릭 머지: 결과로 들어온 키를 컨텍스트에 안전하게 반영.
+    - 타입을 변형하지 않음(문자열화 금지)
+    - 파생 필드(month 등) 계산
+    """
+    # 원본 키들 그대로 반영
+    for k, v in result_data.items():
+        context[k] = v
+
+    # 파생: today → month
+    if "today" in result_data and isinstance(result_data["today"], str) and len(result_data["today"]) >= 7:
+        context["month"] = result_data["today"][:7]
+
+    # 파생: parse_pdf → summarize_text 입력 준비
+    if "text" in result_data and isinstance(result_data["text"], str):
+        context["text_to_summarize"] = result_data["text"]
+
+    # 파생: summarize_text → generate_feedback 입력 준비
+    if "summary" in result_data and isinstance(result_data["summary"], str):
+        context["kpi_summary"] = result_data["summary"]
+
+    # 파생: get_feedback_template -> generate_feedback 입력 준비
+    if "template" in result_data and isinstance(result_data["template"], str):
+        context["template"] = result_data["template"]
+
+    # 파생: generate_feedback → export 계열 입력 준비
+    if "content" in result_data and isinstance(result_data["content"], str):
+        context["content"] = result_data["content"]
+
+# 큰 결과 값은 모델에 그대로 보내지 않고 handle로 컨텍스트에 보관
+# - JSON 직렬화 길이가 이 값을 넘는 필드는 요약(digest)과 handle만 전달합니다.
+PAYLOAD_INLINE_CHARS = int(os.getenv("PAYLOAD_INLINE_CHARS", "2000"))
+# - 보관할 최대 handle 수 (오래된 것부터 삭제)
+PAYLOAD_MAX_HANDLES = int(os.getenv("PAYLOAD_MAX_HANDLES", "20"))
+HANDLE_PREFIX = "@"
+_HANDLES_KEY = "_handles"
+_PREVIEW_LINES = 3
+_PREVIEW_CHARS = 120
+
+def _preview_lines(text: str) -> List[str]:
+    lines = [line.strip() for line in text.splitlines() if line.strip()][:_PREVIEW_LINES]
+    return [line[:_PREVIEW_CHARS] for line in lines]
+
+def _digest(handle: str, value: Any) -> Dict[str, Any]:
+    """큰 값 대신 모델에 보낼 짧은 형식 정보."""
+    digest: Dict[str, Any] = {"handle": handle, "type": type(value).__name__}
+    if isinstance(value, str):
+        digest.update(chars=len(value), head=_preview_lines(value))
+    elif isinstance(value, list):
+        digest["items"] = len(value)
+        if value and isinstance(value[0], dict):
+            digest["keys"] = list(value[0].keys())
+        digest["head"] = [json.dumps(v, ensure_ascii=False)[:_PREVIEW_CHARS] for v in value[:2]]
+    elif isinstance(value, dict):
+        digest["keys"] = list(value.keys())[:20]
+    return digest
+
+def register_payload(context: Dict[str, Any], tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    도구 결과 중 큰 필드를 context의 handle 저장소에 보관하고, 모델에 보낼 결과를 반환합니다.
+    작은 필드는 그대로 두고, 큰 필드는 {"handle": "@도구.키#번호", "type", 크기, 앞부분} 요약으로 바꿉니다.
+    """
+    handles = context.setdefault(_HANDLES_KEY, {})
+    view = {}
+    for key, value in payload.items():
+        if len(json.dumps(value, ensure_ascii=False)) <= PAYLOAD_INLINE_CHARS:
+            view[key] = value
+            continue
+        context["_handle_seq"] = context.get("_handle_seq", 0) + 1
+        handle = f"{HANDLE_PREFIX}{tool}.{key}#{context['_handle_seq']}"
+        handles[handle] = value
+        view[key] = _digest(handle, value)
+
+    # dict는 삽입 순서를 유지하므로 앞쪽이 가장 오래된 handle입니다.
+    for old in list(handles)[:-PAYLOAD_MAX_HANDLES or None]:
+        del handles[old]
+    return view
+
+def _resolve_handle(value: Any, handles: Dict[str, Any]) -> Any:
+    if isinstance(value, str) and value.startswith(HANDLE_PREFIX) and value in handles:
+        return handles[value]
+    if isinstance(value, list):
+        return [_resolve_handle(v, handles) for v in value]
+    return value
+
+def _inject_args_from_context(tool: str, args: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    # 모델이 인자로 넘긴 handle은 보관된 실제 값으로 바꿉니다.
+    handles = context.get(_HANDLES_KEY) or {}
+    if handles:
+        for name, value in list(args.items()):
+            args[name] = _resolve_handle(value, handles)
+
+    if tool in TOOL_CONTEXT_MAP:
+        for name in TOOL_CONTEXT_MAP[tool]:
+            if name in context and name not in args:
+                args[name] = context[name]
+    return args
@@ -0,0 +1,117 @@
+# 의존 관계가 있는 도구 호출 묶음(DAG)을 병렬로 실행
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Tuple
+
+from .context import _inject_args_from_context, _merge_tool_result_into_context
+
+# 동시에 실행할 최대 도구 호출 수
+DAG_MAX_WORKERS = int(os.getenv("DAG_MAX_WORKERS", "4"))
+
+def normalize_nodes(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    LLM/파이프라인이 준 호출 목록을 노드 리스트로 정리하고 검증합니다.
+    각 호출: {"id": str (생략 시 tool 이름 또는 순번), "tool": str, "args": dict, "depends_on": [id, ...]}
+    Raises:
+        ValueError: id 중복, 존재하지 않는 의존 대상, 순환 의존이 있는 경우
+    """
+    nodes, seen = [], set()
+    for i, call in enumerate(calls):
+        if not isinstance(call, dict) or not call.get("tool"):
+            raise ValueError(f"{i}번째 호출에 tool이 없습니다.")
+        node_id = str(call.get("id") or (call["tool"] if call["tool"] not in seen else f"{call['tool']}#{i}"))
+        if node_id in seen:
+            raise ValueError(f"중복된 id입니다: {node_id}")
+        seen.add(node_id)
+        depends_on = call.get("depends_on") or []
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        nodes.append({
+            "id": node_id,
+            "tool": call["tool"],
+            "args": dict(call.get("args") or {}),
+            "depends_on": [str(d) for d in depends_on],
+        })
+
+    for node in nodes:
+        for dep in node["depends_on"]:
+            if dep not in seen:
+                raise ValueError(f"{node['id']}의 의존 대상 {dep}을(를) 찾을 수 없습니다.")
+
+    # 위상 정렬로 순환 검사
+    remaining = {n["id"]: set(n["depends_on"]) for n in nodes}
+    while remaining:
+        ready = [k for k, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"순환 의존이 있습니다: {sorted(remaining)}")
+        for k in ready:
+            del remaining[k]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return nodes
+
+def run_dag(
+    calls: List[Dict[str, Any]],
+    context: Dict[str, Any],
+    execute: Callable[[str, Dict[str, Any]], Tuple[bool, Dict[str, Any]]],
+    *,
+    max_workers: int = None,
+    on_done: Callable[[Dict[str, Any]], None] | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    의존 대상이 모두 성공한 호출부터 스레드 풀에서 동시에 실행합니다.
+    인자 주입과 컨텍스트 병합은 호출 스레드에서만 하므로 context에 대한 경쟁은 없습니다.
+    Args:
+        calls: normalize_nodes 형식의 호출 목록
+        context: 도구 결과가 병합될 컨텍스트 (제자리 수정)
+        execute: (tool, args) -> (성공 여부, 결과 payload)
+        on_done: 각 노드가 끝날 때 결과 dict로 호출됩니다.
+    Returns:
+        list: 입력 순서대로 {"id", "tool", "args", "status": success|error|blocked, "payload", "elapsed"}
+              blocked는 의존 대상이 실패해 실행하지 않은 호출입니다.
+    """
+    nodes = normalize_nodes(calls)
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = list(nodes)
+    running = {}
+
+    def finish(node, status, payload, elapsed=0.0):
+        record = {"id": node["id"], "tool": node["tool"], "args": node["args"],
+                  "status": status, "payload": payload, "elapsed": round(elapsed, 3)}
+        results[node["id"]] = record
+        if on_done:
+            on_done(record)
+
+    def timed(tool, args):
+        started = time.perf_counter()
+        try:
+            ok, payload = execute(tool, args)
+        except Exception as e:
+            ok, payload = False, {"status": "error", "message": f"{tool} 실행 중 오류: {e}"}
+        return ok, payload, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max_workers or DAG_MAX_WORKERS) as pool:
+        while pending or running:
+            for node in list(pending):
+                dep_status = [results[d]["status"] for d in node["depends_on"] if d in results]
+                if any(s != "success" for s in dep_status):
+                    pending.remove(node)
+                    failed = [d for d in node["depends_on"] if results.get(d, {}).get("status") not in (None, "success")]
+                    finish(node, "blocked", {"status": "error", "message": f"의존 대상 실패: {failed}"})
+                elif len(dep_status) == len(node["depends_on"]):
+                    pending.remove(node)
+                    node["args"] = _inject_args_from_context(node["tool"], node["args"], context)
+                    running[pool.submit(timed, node["tool"], node["args"])] = node
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                ok, payload, elapsed = future.result()
+                if ok:
+                    _merge_tool_result_into_context(context, payload)
+                finish(node, "success" if ok else "error", payload, elapsed)
+
+    return [results[n["id"]] for n in nodes]
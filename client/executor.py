@@ -1,15 +1,302 @@
 #계획(plan)을 읽고 MCP 서버 툴을 실제 실행
+import os
+import json
+import time
+import random
+import asyncio
+import weakref
+import threading
 import requests
-MCP_SERVER_URL = "http://localhost:8000"
+from requests.adapters import HTTPAdapter
+
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8000")
+
+# 도구 실행 방식
+# - http: MCP 서버(MCP_SERVER_URL)에 요청 (기본값)
+# - inprocess: 현재 프로세스에서 mcp_server.tools를 직접 호출 (단일 노드 / GUI 내 에이전트용)
+MCP_EXECUTOR = os.getenv("MCP_EXECUTOR", "http").lower()
+
+# 연결 설정
+# - 연결/응답 제한 시간(초). LLM 도구는 응답이 길 수 있어 읽기 제한을 넉넉히 둡니다.
+MCP_CONNECT_TIMEOUT = float(os.getenv("MCP_CONNECT_TIMEOUT", "3"))
+MCP_READ_TIMEOUT = float(os.getenv("MCP_READ_TIMEOUT", "300"))
+# - keep-alive 연결 풀 크기 (DAG 병렬 실행 수보다 크게)
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "10"))
+# - 재시도 횟수와 지수 백오프 기본 간격(초). 같은 호출을 반복해도 안전한 도구에만 적용합니다.
+MCP_MAX_RETRIES = int(os.getenv("MCP_MAX_RETRIES", "2"))
+MCP_BACKOFF_BASE = float(os.getenv("MCP_BACKOFF_BASE", "0.2"))
+
+# 부작용이 없어 재시도해도 되는 도구 (export 계열은 중복 생성될 수 있어 제외)
+IDEMPOTENT_TOOLS = {
+    "get_today", "list_todos", "get_pdf_filename", "list_pdf_files",
+    "parse_pdf", "summarize_text", "get_feedback_template", "generate_feedback",
+}
+_RETRY_STATUS = {502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """프로세스 전역 keep-alive 세션. 스레드 간에 연결 풀을 공유합니다."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MCP_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+def _backoff(attempt: int) -> float:
+    return MCP_BACKOFF_BASE * (2 ** attempt) + random.uniform(0, MCP_BACKOFF_BASE)
+
+def _max_attempts(tool: str) -> int:
+    return MCP_MAX_RETRIES + 1 if tool in IDEMPOTENT_TOOLS else 1
+
+def _execute_inprocess(plan: dict):
+    """서버의 run_tool과 같은 규칙으로 도구를 직접 호출하고 HTTP 실행과 같은 응답 형식으로 감쌉니다."""
+    from mcp_server.tools import TOOLS
+
+    tool = plan.get("tool")
+    args = plan.get("args", {}) or {}
+    if tool not in TOOLS:
+        return {"status": "200", "result": {"status": "error", "message": f"Unknown tool: {tool}"}}
+    try:
+        return {"status": "200", "result": TOOLS[tool](**args)}
+    except Exception as e:
+        return {"status": "200", "result": {"status": "error", "message": str(e)}}
 
 def execute_plan(plan: dict):
+    if MCP_EXECUTOR == "inprocess":
+        return _execute_inprocess(plan)
+    return _execute_http(plan)
+
+def _execute_http(plan: dict):
     tool = plan.get("tool")
     args = plan.get("args", {})
 
     url = f"{MCP_SERVER_URL}/tools/{tool}"
-    resp = requests.post(url, json={"args": args})
+    attempts = _max_attempts(tool)
+    for attempt in range(attempts):
+        try:
+            resp = get_session().post(url, json={"args": args}, timeout=(MCP_CONNECT_TIMEOUT, MCP_READ_TIMEOUT))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            # 읽기 시간 초과는 서버가 이미 처리 중일 수 있으므로 재시도하지 않습니다.
+            if attempt + 1 < attempts and not isinstance(e, requests.ReadTimeout):
+                time.sleep(_backoff(attempt))
+                continue
+            return {"status": "error", "message": f"MCP 서버 호출 실패 ({url}): {e}"}
 
+        if resp.status_code in _RETRY_STATUS and attempt + 1 < attempts:
+            time.sleep(_backoff(attempt))
+            continue
+        if resp.status_code == 200:
+            return {"status": "200", "result" : resp.json()}
+        else:
+            return {"status": "error", "message": resp.text}
+
+def _execute_batch_inprocess(plans: list):
+    """서버의 /tools/batch와 같은 결과 형식으로, 현재 프로세스의 스레드에서 배치를 실행합니다."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def run_item(index, plan, futures):
+        deps = plan.get("depends_on") or []
+        failed = [d for d in deps if futures[d].result()["status"] != "success"]
+        record = {"index": index, "tool": plan.get("tool")}
+        if failed:
+            return {**record, "status": "skipped", "result": {"status": "error", "message": f"의존 항목 실패: {failed}"}, "elapsed": 0.0}
+        started = time.perf_counter()
+        result = _execute_inprocess(plan)["result"]
+        status = "error" if not isinstance(result, dict) or result.get("status") == "error" else "success"
+        return {**record, "status": status, "result": result, "elapsed": round(time.perf_counter() - started, 3)}
+
+    for i, plan in enumerate(plans):
+        if any(not 0 <= d < i for d in plan.get("depends_on") or []):
+            return {"status": "200", "result": {"status": "error", "message": f"{i}번 항목의 depends_on은 앞선 항목의 인덱스만 가리킬 수 있습니다."}}
+
+    # 앞선 항목을 기다리는 작업이 있으므로 항목 수만큼 스레드를 둡니다.
+    futures = []
+    with ThreadPoolExecutor(max_workers=max(1, len(plans))) as pool:
+        for i, plan in enumerate(plans):
+            futures.append(pool.submit(run_item, i, plan, futures))
+        results = [f.result() for f in futures]
+    return {"status": "200", "result": {"status": "success", "results": results}}
+
+def execute_batch(plans: list):
+    """
+    여러 도구 호출을 한 번에 실행합니다. (HTTP 실행 시 MCP 서버 왕복 1회)
+    Args:
+        plans (list): [{"tool": str, "args": dict, "depends_on": [앞선 항목 인덱스, ...]}, ...]
+    Returns:
+        dict: {"status": "200", "result": {"status": "success", "results": [{"index", "tool", "status", "result", "elapsed"}, ...]}}
+              또는 {"status": "error", "message": ...}
+    """
+    if MCP_EXECUTOR == "inprocess":
+        return _execute_batch_inprocess(plans)
+
+    url = f"{MCP_SERVER_URL}/tools/batch"
+    items = [{"tool": p.get("tool"), "args": p.get("args", {}) or {}, "depends_on": p.get("depends_on") or []} for p in plans]
+    try:
+        resp = get_session().post(url, json={"items": items}, timeout=(MCP_CONNECT_TIMEOUT, MCP_READ_TIMEOUT))
+    except (requests.ConnectionError, requests.Timeout) as e:
+        return {"status": "error", "message": f"MCP 서버 호출 실패 ({url}): {e}"}
     if resp.status_code == 200:
-        return {"status": "200", "result" : resp.json()}
-    else:
+        return {"status": "200", "result": resp.json()}
+    return {"status": "error", "message": resp.text}
+
+# ---- 백그라운드 작업 (MCP 서버의 /jobs) ----
+def _jobs_request(method: str, path: str, **kwargs):
+    url = f"{MCP_SERVER_URL}{path}"
+    try:
+        resp = get_session().request(method, url, timeout=(MCP_CONNECT_TIMEOUT, MCP_READ_TIMEOUT), **kwargs)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        return {"status": "error", "message": f"MCP 서버 호출 실패 ({url}): {e}"}
+    if resp.status_code != 200:
+        return {"status": "error", "message": resp.text}
+    return resp.json()
+
+def submit_job(plan: dict):
+    """도구 호출을 백그라운드 작업으로 등록합니다. Returns: {"status": "success", "job": {"id", "status", ...}}"""
+    if MCP_EXECUTOR == "inprocess":
+        from mcp_server.jobs import get_queue
+        try:
+            return {"status": "success", "job": get_queue().submit(plan.get("tool"), plan.get("args", {}) or {})}
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+    return _jobs_request("POST", "/jobs", json={"tool": plan.get("tool"), "args": plan.get("args", {}) or {}})
+
+def get_job(job_id: str):
+    if MCP_EXECUTOR == "inprocess":
+        from mcp_server.jobs import get_queue
+        job = get_queue().get(job_id)
+        return {"status": "success", "job": job} if job else {"status": "error", "message": f"Unknown job: {job_id}"}
+    return _jobs_request("GET", f"/jobs/{job_id}")
+
+def get_job_result(job_id: str):
+    """끝난 작업이면 {"status": "success", "job_status", "result", "error"}, 아니면 {"status": "pending", "job_status"}."""
+    if MCP_EXECUTOR == "inprocess":
+        from mcp_server.jobs import get_queue
+        return get_queue().result_response(job_id)
+    return _jobs_request("GET", f"/jobs/{job_id}/result")
+
+def cancel_job(job_id: str):
+    if MCP_EXECUTOR == "inprocess":
+        from mcp_server.jobs import get_queue
+        job = get_queue().cancel(job_id)
+        return {"status": "success", "job": job} if job else {"status": "error", "message": f"Unknown job: {job_id}"}
+    return _jobs_request("DELETE", f"/jobs/{job_id}")
+
+def wait_job(job_id: str, timeout: float = None, interval: float = 1.0):
+    """작업이 끝날 때까지 get_job_result를 주기적으로 확인합니다. 시간 초과 시 마지막 pending 응답을 반환합니다."""
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        res = get_job_result(job_id)
+        if res.get("status") != "pending" or (deadline and time.monotonic() >= deadline):
+            return res
+        time.sleep(interval)
+
+# 이벤트 루프별 httpx.AsyncClient (asyncio.run이 여러 번 호출될 수 있음)
+_async_clients = weakref.WeakKeyDictionary()
+
+def _get_async_client():
+    import httpx  # 비동기 실행에만 필요 (notion-client 의존성으로 함께 설치됨)
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(MCP_READ_TIMEOUT, connect=MCP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_keepalive_connections=MCP_POOL_SIZE, max_connections=MCP_POOL_SIZE),
+        )
+        _async_clients[loop] = client
+    return client
+
+async def _execute_inprocess_async(plan: dict):
+    from mcp_server.tools import TOOLS, ASYNC_TOOLS
+
+    tool = plan.get("tool")
+    args = plan.get("args", {}) or {}
+    if tool not in TOOLS:
+        return {"status": "200", "result": {"status": "error", "message": f"Unknown tool: {tool}"}}
+    try:
+        if tool in ASYNC_TOOLS:
+            result = await ASYNC_TOOLS[tool](**args)
+        else:
+            result = await asyncio.to_thread(TOOLS[tool], **args)
+        return {"status": "200", "result": result}
+    except Exception as e:
+        return {"status": "200", "result": {"status": "error", "message": str(e)}}
+
+async def execute_plan_async(plan: dict):
+    """execute_plan의 asyncio 버전. 응답 형식과 재시도 규칙은 동일합니다."""
+    if MCP_EXECUTOR == "inprocess":
+        return await _execute_inprocess_async(plan)
+
+    import httpx
+
+    tool = plan.get("tool")
+    args = plan.get("args", {})
+
+    url = f"{MCP_SERVER_URL}/tools/{tool}"
+    attempts = _max_attempts(tool)
+    for attempt in range(attempts):
+        try:
+            resp = await _get_async_client().post(url, json={"args": args})
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError) as e:
+            if attempt + 1 < attempts:
+                await asyncio.sleep(_backoff(attempt))
+                continue
+            return {"status": "error", "message": f"MCP 서버 호출 실패 ({url}): {e}"}
+        except httpx.HTTPError as e:
+            return {"status": "error", "message": f"MCP 서버 호출 실패 ({url}): {e}"}
+
+        if resp.status_code in _RETRY_STATUS and attempt + 1 < attempts:
+            await asyncio.sleep(_backoff(attempt))
+            continue
+        if resp.status_code == 200:
+            return {"status": "200", "result": resp.json()}
         return {"status": "error", "message": resp.text}
+
+def stream_plan(plan: dict):
+    """
+    MCP 서버의 스트리밍 엔드포인트를 호출해 이벤트(dict)를 도착하는 대로 yield 합니다.
+    """
+    tool = plan.get("tool")
+    args = plan.get("args", {})
+
+    if MCP_EXECUTOR == "inprocess":
+        from mcp_server.tools import STREAM_TOOLS
+        if tool not in STREAM_TOOLS:
+            yield {"status": "error", "message": f"Streaming not supported: {tool}"}
+            return
+        try:
+            yield from STREAM_TOOLS[tool](**(args or {}))
+        except Exception as e:
+            yield {"status": "error", "message": str(e)}
+        return
+
+    url = f"{MCP_SERVER_URL}/tools/{tool}/stream"
+    try:
+        resp = get_session().post(url, json={"args": args}, stream=True, timeout=(MCP_CONNECT_TIMEOUT, MCP_READ_TIMEOUT))
+    except (requests.ConnectionError, requests.Timeout) as e:
+        yield {"status": "error", "message": f"MCP 서버 호출 실패 ({url}): {e}"}
+        return
+
+    with resp:
+        if resp.status_code != 200:
+            yield {"status": "error", "message": resp.text}
+            return
+
+        event = None
+        for line in resp.iter_lines(decode_unicode=True):
+            if not line:
+                event = None
+                continue
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                if event == "end":
+                    return
+                yield json.loads(line[len("data:"):].strip())
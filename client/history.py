@@ -0,0 +1,111 @@
+# 에이전트 대화 기록(messages) 압축
+import os
+import re
+from typing import Any, Dict, List
+
+from mcp_server.utils.token_utils import estimate_tokens
+
+# 그대로 유지할 최근 메시지 수 (시스템 프롬프트 제외)
+HISTORY_KEEP_MESSAGES = int(os.getenv("HISTORY_KEEP_MESSAGES", "6"))
+# 시스템 프롬프트를 뺀 기록이 이 토큰 수를 넘으면 오래된 턴을 요약 한 건으로 바꿉니다.
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "6000"))
+
+SUMMARY_PREFIX = "[이전 대화 요약]"
+_RESULT_JSON = re.compile(r"Result JSON:\n[^\n]*")
+_RESULT_REF = "Result: (본문 생략 — 값은 llm_context에 보관되어 이후 도구 인자로 주입됩니다)"
+# 요약 실패 시 메시지별로 남길 글자 수
+_FALLBACK_CHARS = 200
+
+def _text(message: Dict[str, Any]) -> str:
+    return "".join(p.get("text", "") for p in message.get("parts", []) if isinstance(p, dict))
+
+def _set_text(message: Dict[str, Any], text: str) -> None:
+    message["parts"] = [{"text": text}]
+
+def history_tokens(messages: List[Dict[str, Any]]) -> int:
+    return sum(estimate_tokens(_text(m)) for m in messages)
+
+def _split(messages: List[Dict[str, Any]]):
+    """
+    (시스템 프롬프트, 오래된 턴, 최근 턴)으로 나눕니다.
+    - 첫 메시지는 역할과 관계없이 시스템 프롬프트로 보고 항상 남깁니다 (GUI는 role="user"로 보냅니다).
+    - 최근 턴은 가능하면 model 메시지에서 시작하도록 맞춰 역할이 번갈아 이어지게 합니다.
+    """
+    head = min(1, len(messages))
+    while head < len(messages) and messages[head].get("role") == "system":
+        head += 1
+    body = messages[head:]
+    cut = max(0, len(body) - HISTORY_KEEP_MESSAGES)
+    aligned = cut
+    while 0 < aligned < len(body) and body[aligned].get("role") != "model":
+        aligned += 1
+    if aligned < len(body):
+        cut = aligned
+    # 최근 구간에 model 메시지가 없으면 원래 경계를 그대로 씁니다 (전부 요약되지 않도록).
+    return messages[:head], body[:cut], body[cut:]
+
+def _compact_tool_results(old: List[Dict[str, Any]]) -> int:
+    """오래된 도구 결과 피드백의 JSON 본문을 컨텍스트 참조로 바꿉니다. 바꾼 메시지 수를 반환합니다."""
+    changed = 0
+    for message in old:
+        if message.get("role") != "user":
+            continue
+        text = _text(message)
+        compacted = _RESULT_JSON.sub(_RESULT_REF, text)
+        if compacted != text:
+            _set_text(message, compacted)
+            changed += 1
+    return changed
+
+def _summarize(old: List[Dict[str, Any]]) -> str:
+    transcript = "\n".join(f"{m.get('role')}: {_text(m)}" for m in old)
+    prompt = f"""다음은 도구를 호출하는 에이전트와 사용자의 이전 대화 기록입니다.
+이후 대화를 이어가는 데 필요한 사실(사용자 요청, 호출한 도구와 성공/실패, 확정된 값, 남은 작업)만 한국어 목록으로 간결하게 요약해 주세요.
+
+{transcript}
+"""
+    try:
+        from mcp_server.utils.gemini_helper import call_gemini
+        result = call_gemini(prompt)
+        summary = result.get("result", {}).get("text", "").strip() if result.get("status") == "ok" else ""
+    except Exception as e:
+        print(f"[history] 요약 실패: {e}")
+        summary = ""
+    if summary:
+        return summary
+    # 요약 호출이 실패하면 각 메시지 앞부분만 남깁니다.
+    return "\n".join(f"- {m.get('role')}: {_text(m)[:_FALLBACK_CHARS]}" for m in old)
+
+def compact_history(messages: List[Dict[str, Any]], context: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """
+    agent_step이 모델에 보내기 전에 messages를 제자리에서 압축합니다.
+      1) 시스템 프롬프트와 최근 HISTORY_KEEP_MESSAGES개 메시지는 그대로 둡니다.
+      2) 그보다 오래된 도구 결과는 JSON 본문을 지우고 llm_context 참조로 바꿉니다.
+      3) 그래도 HISTORY_SUMMARY_TOKENS를 넘으면 오래된 턴을 요약 메시지 한 건으로 바꿉니다.
+    Returns:
+        dict: {"before_tokens", "after_tokens", "compacted_results", "summarized"}
+    """
+    head, old, recent = _split(messages)
+    before = history_tokens(messages[len(head):])
+    stats = {"before_tokens": before, "after_tokens": before, "compacted_results": 0, "summarized": 0}
+    if not old:
+        return stats
+
+    stats["compacted_results"] = _compact_tool_results(old)
+
+    # 요약으로 줄일 몫이 작으면(이미 요약된 직후 등) 매 스텝 다시 요약하지 않습니다.
+    old_tokens = history_tokens(old)
+    if old_tokens + history_tokens(recent) > HISTORY_SUMMARY_TOKENS and old_tokens >= HISTORY_SUMMARY_TOKENS // 4:
+        summary = _summarize(old)
+        if context:
+            summary += f"\n(현재 llm_context 키: {', '.join(sorted(k for k in context if not k.startswith('_')))})"
+            if context.get("_handles"):
+                summary += f"\n(사용 가능한 handle: {', '.join(context['_handles'])})"
+        stats["summarized"] = len(old)
+        messages[:] = head + [{"role": "user", "parts": [{"text": f"{SUMMARY_PREFIX}\n{summary}"}]}] + recent
+
+    stats["after_tokens"] = history_tokens(messages[len(head):])
+    if stats["after_tokens"] != before:
+        print(f"[history] 기록 압축: {before} → {stats['after_tokens']} 토큰 "
+              f"(도구 결과 {stats['compacted_results']}건 축약, 요약 {stats['summarized']}건)")
+    return stats
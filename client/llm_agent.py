@@ -1,63 +1,69 @@
 import os
 import json
+import asyncio
 from typing import Any, Dict, List, Tuple
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
 from .executor import execute_plan
+from .context import TOOL_CONTEXT_MAP, _merge_tool_result_into_context, _inject_args_from_context, register_payload
+from .dag import run_dag
+from .history import compact_history
 from mcp_server.tools import DESCRIPTIONS
 
 # === Gemini 모델 설정 ===
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-model = genai.GenerativeModel(
-    "gemini-2.0-flash",
-    generation_config={
-        "response_mime_type": "application/json",
-        "temperature": 0.2,
-        "top_p": 0.9,
-        "max_output_tokens": 8192,
-    },
-    safety_settings={
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-    },
-)
-
-# 각 도구가 컨텍스트에서 어떤 인자가 필요한지 정의
-TOOL_CONTEXT_MAP: Dict[str, List[str]] = {
-    "summarize_text": ["text_to_summarize"],
-    "generate_feedback": ["month", "todos", "kpi_summary", "template"],
-    "export_to_notion": ["month", "content"],
-    "export_report": ["month", "content"],
-    # get_today / list_todos / parse_pdf 등은 인자 불필요 또는 실행 결과로 연결
-}
+# google.generativeai는 import 비용이 커서 첫 스텝에서 모델을 만들 때 불러옵니다.
+_model = None
+
+def _get_model():
+    global _model
+    if _model is None:
+        import google.generativeai as genai
+        from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _model = genai.GenerativeModel(
+            "gemini-2.0-flash",
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0.2,
+                "top_p": 0.9,
+                "max_output_tokens": 8192,
+            },
+            safety_settings={
+                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+            },
+        )
+    return _model
 
 # 1) 프롬프트 템플릿에서 DESCRIPTIONS 자리만 토큰으로 남깁니다.
 SYSTEM_PROMPT_CORE = """당신은 도구를 호출하여 사용자를 돕는 AI 에이전트입니다. 목표는 사용자의 요청을 해결하기 위해
-한 번에 '정확히 하나'의 도구만 호출하거나(final_answer) 다음 단계 결론을 반환하는 것입니다.
+도구를 호출하거나(tool_code / tool_batch) 결론(final_answer)을 반환하는 것입니다.
+서로 결과를 기다릴 필요가 없는 도구들은 tool_batch로 한 번에 요청하면 동시에 실행됩니다.
 
 사용 가능한 도구 목록:
 {DESCRIPTIONS}
 
 [시나리오 예시: 월간 보고서 + Notion]
 1) get_today → 2) list_todos → 3) get_pdf_filename → 4) parse_pdf → 5) summarize_text → 6) get_feedback_template → 7) generate_feedback → 8) export_to_notion
-항상 '한 단계씩만' 진행하세요.
+get_today→list_todos, get_pdf_filename→parse_pdf→summarize_text, get_feedback_template 은 서로 독립이므로 하나의 tool_batch로 요청하세요.
 
 [월간 보고서 / 월간 피드백 작성 규칙]
 1) get_today → 2) list_todos → 3) get_pdf_filename → 4) parse_pdf → 5) summarize_text → 6) get_feedback_template → 7) generate_feedback → 8) export_to_notion
-항상 '한 단계씩만' 진행하세요.
-- 월간 보고서 작성시 참조할 list_todos 에서 날짜는 get_today 로부터 받은 date 와 동일한 month 에 해당하는 항목만 조회하세요.
+독립적인 단계는 tool_batch로 묶고, 앞 단계 결과가 필요한 단계는 depends_on으로 연결하세요.
+- 월간 보고서 작성시 list_todos 는 get_today 로부터 받은 date 의 YYYY-MM 을 month 인자로 넘겨 해당 월 항목만 조회하세요. (필터링은 서버에서 처리됩니다)
 
 [응답 규칙]
 - 항상 JSON으로만 응답.
-- 월간 보고서 작업 시 list_todos 툴을 사용 할때는, get_today 툴로부터 받은 date 중 동일한 month 에 해당하는 todo 목록을 조회하세요.
+- list_todos 는 필요한 조건(month, status, impact, date_from, date_to)과 필요한 키(fields)만 지정해 호출하세요. month 를 넘기지 않으면 모든 월을 조회하며, 결과는 모든 페이지를 합친 전체 목록입니다.
 - 다음 중 하나의 최상위 키를 포함:
   - tool_code: {"tool": string, "args": object}
+  - tool_batch: [{"id": string, "tool": string, "args": object, "depends_on": [id, ...]}, ...]
+    (depends_on 에 적은 호출이 성공한 뒤 실행되며, 그 결과는 컨텍스트를 통해 인자로 자동 전달됩니다. 예: parse_pdf 는 get_pdf_filename 에 의존)
   - final_answer: string
 - 하나의 작업이 `final_answer`로 완료되면, 그 작업은 끝난 것입니다. 다음 사용자 메시지는 이전 대화와 관련 없는 **새로운 요청**으로 간주해야 합니다. (단, 사용자가 이전 결과에 대해 직접 질문하는 경우는 예외입니다.)
 - 할 일 목록(todos)을 사용자에게 보여줄 때는, 각 항목을 글머리 기호(-)를 사용하여 날짜, 할 일, 상태 순서로 보기 좋게 정리해서 보여주세요.
+- 결과 JSON에서 큰 값은 {"handle": "@도구.키#번호", "type", "chars"/"items", "head"} 형태의 요약으로만 전달됩니다. 그 값을 도구 인자로 넘길 때는 내용을 옮겨 적지 말고 handle 문자열을 그대로 인자 값으로 넣으세요. (실행 시 실제 값으로 바뀝니다)
 - 도구 호출 실패 피드백을 받으면, 원인 해결을 위한 '다음 단일 도구'를 제안하세요.
 - 존재하지 않는 도구는 절대 만들지 마세요.
 - export 작업을 할때에는 markdown 은 모두 제거된 순수 텍스트로 된 내용을 content 인자로 넘기세요.
@@ -70,65 +76,106 @@ def get_system_prompt(command: str = "") -> str:
     core = SYSTEM_PROMPT_CORE.replace("{DESCRIPTIONS}", DESCRIPTIONS)
     return f"{core}\n사용자 명령어: {command}\n"
 
-def _merge_tool_result_into_context(context: Dict[str, Any], result_data: Dict[str, Any]) -> None:
-    """
-    제네릭 머지: 결과로 들어온 키를 컨텍스트에 안전하게 반영.
-    - 타입을 변형하지 않음(문자열화 금지)
-    - 파생 필드(month 등) 계산
-    """
-    # 원본 키들 그대로 반영
-    for k, v in result_data.items():
-        context[k] = v
-
-    # 파생: today → month
-    if "today" in result_data and isinstance(result_data["today"], str) and len(result_data["today"]) >= 7:
-        context["month"] = result_data["today"][:7]
-
-    # 파생: parse_pdf → summarize_text 입력 준비
-    if "text" in result_data and isinstance(result_data["text"], str):
-        context["text_to_summarize"] = result_data["text"]
-
-    # 파생: summarize_text → generate_feedback 입력 준비
-    if "summary" in result_data and isinstance(result_data["summary"], str):
-        context["kpi_summary"] = result_data["summary"]
-
-    # 파생: get_feedback_template -> generate_feedback 입력 준비
-    if "template" in result_data and isinstance(result_data["template"], str):
-        context["template"] = result_data["template"]
-
-    # 파생: generate_feedback → export 계열 입력 준비
-    if "content" in result_data and isinstance(result_data["content"], str):
-        context["content"] = result_data["content"]
-
-def _inject_args_from_context(tool: str, args: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
-    if tool in TOOL_CONTEXT_MAP:
-        for name in TOOL_CONTEXT_MAP[tool]:
-            if name in context and name not in args:
-                args[name] = context[name]
-    return args
-
-def _as_user_feedback(tool: str, ok: bool, payload: Dict[str, Any]) -> str:
+def _as_user_feedback(tool: str, ok: bool, payload: Dict[str, Any], context: Dict[str, Any]) -> str:
     if ok:
-        # 요약 헤더 + 축약 JSON(길면 잘라서)
-        short = json.dumps(payload, ensure_ascii=False)
-        if len(short) > 2000:  # 토큰 절약
-            short = short[:2000] + "…(truncated)"
+        # 요약 헤더 + 결과 JSON (큰 필드는 context에 보관하고 handle 요약만 전달)
+        short = json.dumps(register_payload(context, tool, payload), ensure_ascii=False)
         return f"Tool {tool} executed successfully.\nResult JSON:\n{short}"
     else:
         message = payload.get("message", "Unknown error")
         return f"Tool {tool} failed.\nReason: {message}\nHint: Provide missing args or call a preparatory tool."
 
+# next_cursor를 끝까지 따라가 todos를 합치는 도구 (context["todos"]가 첫 페이지만 담지 않도록)
+PAGINATED_TOOLS = {"list_todos"}
+
+def _execute_once(tool: str, args: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+    execution_result = execute_plan({"tool": tool, "args": args})
+    if execution_result.get("status") != "200":
+        return False, {"message": execution_result.get("message", execution_result)}
+    result_payload = execution_result.get("result", {})
+    if isinstance(result_payload, dict) and result_payload.get("status") != "error":
+        return True, result_payload
+    return False, result_payload if isinstance(result_payload, dict) else {"message": result_payload}
+
+def _execute_tool(tool: str, args: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+    """
+    도구 하나를 실행하고 (성공 여부, 결과 payload)를 반환합니다.
+    PAGINATED_TOOLS는 모델이 cursor를 직접 넘기지 않은 경우 남은 페이지까지 조회해 한 결과로 합칩니다.
+    """
+    ok, payload = _execute_once(tool, args)
+    if not ok or tool not in PAGINATED_TOOLS or args.get("cursor"):
+        return ok, payload
+    todos = list(payload.get("todos", []))
+    while payload.get("next_cursor"):
+        ok, payload = _execute_once(tool, dict(args, cursor=payload["next_cursor"]))
+        if not ok:
+            return ok, payload
+        todos.extend(payload.get("todos", []))
+    return True, {"status": "success", "todos": todos, "count": len(todos), "next_cursor": None}
+
+def _run_tool_batch(calls: List[Dict[str, Any]], context: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    tool_batch를 의존 관계에 따라 병렬 실행하고 (LLM 피드백, 실행 기록)을 반환합니다.
+    """
+    try:
+        records = run_dag(calls, context, _execute_tool)
+    except ValueError as e:
+        return f"Tool batch rejected.\nReason: {e}\nHint: Check ids and depends_on.", []
+
+    feedback = []
+    for r in records:
+        if r["status"] == "blocked":
+            feedback.append(f"Tool {r['tool']} ({r['id']}) was not run.\nReason: {r['payload']['message']}")
+        else:
+            feedback.append(_as_user_feedback(r["tool"], r["status"] == "success", r["payload"], context))
+    return "\n\n".join(feedback), records
+
+def _response_text(response) -> str:
+    try:
+        return response.text or ""
+    except ValueError:
+        # 안전 필터 등으로 text 파트가 없는 응답
+        return ""
+
 def agent_step(messages: List[Dict[str, Any]], context: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any], str, bool, Dict[str, Any] | None]:
     """
     에이전트의 단일 스텝.
     """
-    wip_content = None
+    # 오래된 도구 결과/턴을 압축해 스텝마다 입력 크기가 일정하게 유지되도록 함
+    compact_history(messages, context)
     try:
-        response = model.generate_content(messages)
-        text = getattr(response, "text", "") or ""
+        response = _get_model().generate_content(messages)
+        text = _response_text(response)
     except Exception as e:
         ui_message = f"모델 호출 중 오류: {e}"
         return messages, context, ui_message, True, None
+    return _handle_response(text, messages, context)
+
+async def agent_step_async(messages: List[Dict[str, Any]], context: Dict[str, Any]):
+    """
+    agent_step의 asyncio 버전. 반환 형식은 같습니다.
+    모델 호출은 gemini_helper.generate_async(전역 세마포어, 속도 제한 재시도, 제한 시간)를 거치고,
+    기록 요약과 도구 실행처럼 블로킹인 부분은 스레드에서 실행합니다.
+    """
+    from mcp_server.utils.gemini_helper import generate_async
+
+    await asyncio.to_thread(compact_history, messages, context)
+    try:
+        response = await generate_async(_get_model(), messages)
+        text = _response_text(response)
+    except Exception as e:
+        ui_message = f"모델 호출 중 오류: {e}"
+        return messages, context, ui_message, True, None
+    return await asyncio.to_thread(_handle_response, text, messages, context)
+
+def run_agent_step(messages: List[Dict[str, Any]], context: Dict[str, Any]):
+    """동기 코드(GUI)에서 agent_step_async를 프로세스 전역 LLM 이벤트 루프로 실행합니다."""
+    from mcp_server.utils.gemini_helper import run_coroutine
+    return run_coroutine(agent_step_async(messages, context))
+
+def _handle_response(text: str, messages: List[Dict[str, Any]], context: Dict[str, Any]):
+    """모델 응답(JSON 텍스트)을 해석해 도구를 실행하거나 최종 답변을 반환합니다."""
+    wip_content = None
 
     # JSON 파싱
     try:
@@ -155,24 +202,33 @@ def agent_step(messages: List[Dict[str, Any]], context: Dict[str, Any]) -> Tuple
         messages.append({"role": "model", "parts": [{"text": json.dumps({"tool_code": tool_call}, ensure_ascii=False)}]})
 
         # 실제 도구 실행
-        execution_result = execute_plan(tool_call)
-        status_ok = (execution_result.get("status") == "200")
-        result_payload = execution_result.get("result", {}) if isinstance(execution_result, dict) else {}
+        status_ok, result_payload = _execute_tool(tool_name, tool_args)
 
         # 컨텍스트 병합(성공 시)
-        if status_ok and isinstance(result_payload, dict) and result_payload.get("status") != "error":
+        if status_ok:
             _merge_tool_result_into_context(context, result_payload)
-            feedback = _as_user_feedback(tool_name, True, result_payload)
+            feedback = _as_user_feedback(tool_name, True, result_payload, context)
             wip_content = result_payload
         else:
             # 실패 케이스
-            err_payload = result_payload if isinstance(result_payload, dict) else {"message": execution_result}
-            feedback = _as_user_feedback(tool_name, False, err_payload)
+            feedback = _as_user_feedback(tool_name, False, result_payload, context)
 
         # LLM에게 결과 전달
         messages.append({"role": "user", "parts": [{"text": feedback}]})
         return messages, context, f"🛠️ {tool_name} 실행", False, wip_content
 
+    # tool_batch 경로: 독립적인 호출은 동시에, 의존 호출은 선행 호출이 끝난 뒤 실행
+    if isinstance(llm_response.get("tool_batch"), list):
+        calls = llm_response["tool_batch"]
+        messages.append({"role": "model", "parts": [{"text": json.dumps({"tool_batch": calls}, ensure_ascii=False)}]})
+
+        feedback, records = _run_tool_batch(calls, context)
+        messages.append({"role": "user", "parts": [{"text": feedback}]})
+
+        wip_content = {r["id"]: r["payload"] for r in records if r["status"] == "success"} or None
+        summary = ", ".join(f"{r['tool']}({r['status']}, {r['elapsed']}s)" for r in records)
+        return messages, context, f"🛠️ 병렬 실행: {summary or '실행된 도구 없음'}", False, wip_content
+
     # final_answer 경로
     if "final_answer" in llm_response:
         return messages, context, llm_response["final_answer"], True, None
@@ -1,6 +1,37 @@
+import sys
+import json
+import time
+import argparse
 from .llm_agent import run_agent
+from .pipeline import PIPELINES, run_pipeline
+
+def _print_step(tool, step):
+    print(f"  - {tool}: {step['status']} ({step['elapsed']}s)")
 
 def main():
+    parser = argparse.ArgumentParser(description="월간 피드백 에이전트")
+    parser.add_argument("--pipeline", choices=list(PIPELINES), help="LLM 계획 없이 정해진 워크플로를 바로 실행합니다.")
+    parser.add_argument("--month", help="파이프라인 대상 월 (YYYY-MM). 생략하면 오늘 날짜 기준")
+    parser.add_argument("--no-export", action="store_true", help="export_to_notion 단계를 건너뜁니다.")
+    args = parser.parse_args()
+
+    if args.pipeline:
+        print(f"🚀 Running pipeline: {args.pipeline}")
+        started = time.perf_counter()
+        result = run_pipeline(
+            args.pipeline,
+            {"month": args.month} if args.month else None,
+            skip=("export_to_notion",) if args.no_export else (),
+            on_step=_print_step,
+        )
+        if result["status"] != "success":
+            print(f"❌ {result['message']}")
+            sys.exit(1)
+        print(f"\n🏁 Report:\n{result['context'].get('content', '')}")
+        elapsed = round(time.perf_counter() - started, 3)
+        print(json.dumps({"steps": result["steps"], "elapsed": elapsed}, indent=2, ensure_ascii=False))
+        return
+
     command = input("명령어 입력 >> ")
     run_agent(command)
 
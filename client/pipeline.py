@@ -0,0 +1,111 @@
+# 정해진 순서의 작업(워크플로)을 LLM 계획 없이 바로 실행
+from typing import Any, Callable, Dict, List
+
+from mcp_server.tools import TOOLS
+from .dag import run_dag
+
+# 파이프라인 정의
+# - tool: 실행할 도구 이름 (mcp_server.tools.TOOLS의 키)
+# - args: 고정 인자. 나머지 인자는 TOOL_CONTEXT_MAP에 따라 context에서 주입됩니다.
+# - context_args: TOOL_CONTEXT_MAP 외에 이 파이프라인에서만 context에서 가져올 인자 (예: list_todos의 month)
+# - depends_on: 먼저 끝나야 하는 도구. 의존 관계가 없는 단계는 client.dag로 동시에 실행됩니다.
+# - paginate: True이면 next_cursor가 없을 때까지 이어서 조회하고 todos를 합칩니다.
+# - skip_if: context에 이 키가 이미 있으면 건너뜁니다. (예: month를 지정하면 get_today 생략)
+PIPELINES: Dict[str, List[Dict[str, Any]]] = {
+    "monthly_report": [
+        {"tool": "get_today", "skip_if": "month"},
+        {"tool": "list_todos", "context_args": ["month"], "paginate": True, "depends_on": ["get_today"]},
+        # '@designated'는 parse_pdf가 직접 대표 KPI 파일 존재를 확인하므로 get_pdf_filename 없이 바로 시작합니다.
+        {"tool": "parse_pdf", "args": {"filename": "@designated"}},
+        {"tool": "summarize_text", "depends_on": ["parse_pdf"]},
+        {"tool": "get_feedback_template"},
+        {"tool": "generate_feedback", "depends_on": ["list_todos", "summarize_text", "get_feedback_template"]},
+        {"tool": "export_to_notion", "depends_on": ["generate_feedback"]},
+    ],
+}
+
+def _run_paginated(tool: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    todos = []
+    while True:
+        result = TOOLS[tool](**args)
+        if not isinstance(result, dict) or result.get("status") == "error":
+            return result
+        todos.extend(result.get("todos", []))
+        if not result.get("next_cursor"):
+            return {"status": "success", "todos": todos, "count": len(todos)}
+        args = dict(args, cursor=result["next_cursor"])
+
+def run_pipeline(
+    name: str,
+    context: Dict[str, Any] | None = None,
+    *,
+    skip: tuple = (),
+    on_step: Callable[[str, Dict[str, Any]], None] | None = None,
+) -> Dict[str, Any]:
+    """
+    등록된 파이프라인을 의존 순서대로 실행합니다. LLM은 summarize_text / generate_feedback 도구 안에서만 호출됩니다.
+    Args:
+        name (str): PIPELINES의 키 (예: 'monthly_report')
+        context (dict): 초기 컨텍스트 (예: {"month": "2025-07"})
+        skip (tuple): 건너뛸 도구 이름 (예: ("export_to_notion",))
+        on_step (callable): 각 단계가 끝날 때 (tool, step 정보)로 호출됩니다.
+    Returns:
+        dict: {"status": "success"|"error", "context": ..., "steps": [{"tool", "status", "elapsed"}], "message"?}
+    """
+    if name not in PIPELINES:
+        return {"status": "error", "message": f"알 수 없는 파이프라인입니다: {name} (사용 가능: {list(PIPELINES)})"}
+
+    context = dict(context or {})
+    specs = PIPELINES[name]
+    skipped = {
+        spec["tool"] for spec in specs
+        if spec["tool"] in skip or (spec.get("skip_if") and context.get(spec["skip_if"]))
+    }
+    missing = [spec["tool"] for spec in specs if spec["tool"] not in skipped and spec["tool"] not in TOOLS]
+    if missing:
+        return {"status": "error", "message": f"도구를 찾을 수 없습니다: {missing}", "context": context, "steps": []}
+
+    paginate = {spec["tool"] for spec in specs if spec.get("paginate")}
+    context_args = {spec["tool"]: spec["context_args"] for spec in specs if spec.get("context_args")}
+    calls = [
+        {
+            "id": spec["tool"],
+            "tool": spec["tool"],
+            "args": spec.get("args", {}),
+            "depends_on": [d for d in spec.get("depends_on", []) if d not in skipped],
+        }
+        for spec in specs if spec["tool"] not in skipped
+    ]
+
+    def execute(tool, args):
+        # 의존 대상(get_today 등)이 끝난 뒤 실행되므로 필요한 값은 이미 context에 있습니다.
+        args = {**{k: context[k] for k in context_args.get(tool, []) if k in context}, **args}
+        result = _run_paginated(tool, args) if tool in paginate else TOOLS[tool](**args)
+        return isinstance(result, dict) and result.get("status") != "error", result
+
+    def notify(record):
+        if on_step:
+            on_step(record["tool"], {"tool": record["tool"], "status": record["status"], "elapsed": record["elapsed"]})
+
+    records = {r["tool"]: r for r in run_dag(calls, context, execute, on_done=notify)}
+    steps = [
+        {"tool": spec["tool"], "status": "skipped", "elapsed": 0.0} if spec["tool"] in skipped
+        else {"tool": spec["tool"], "status": records[spec["tool"]]["status"], "elapsed": records[spec["tool"]]["elapsed"]}
+        for spec in specs
+    ]
+
+    failed = [r for r in records.values() if r["status"] == "error"]
+    if failed:
+        payload = failed[0]["payload"]
+        message = payload.get("message", "Unknown error") if isinstance(payload, dict) else str(payload)
+        return {"status": "error", "message": f"{failed[0]['tool']} 단계 실패: {message}", "context": context, "steps": steps}
+    return {"status": "success", "context": context, "steps": steps}
+
+def run_monthly_report(month: str = None, *, export: bool = True, on_step=None) -> Dict[str, Any]:
+    """월간 보고서 파이프라인 실행 헬퍼. month가 없으면 오늘 날짜의 월을 사용합니다."""
+    return run_pipeline(
+        "monthly_report",
+        {"month": month} if month else None,
+        skip=() if export else ("export_to_notion",),
+        on_step=on_step,
+    )
@@ -6,13 +6,13 @@ import uuid
 import shutil
 import streamlit as st
 from dotenv import load_dotenv
-from client.llm_agent import agent_step, get_system_prompt
+from client.llm_agent import run_agent_step, get_system_prompt
+from mcp_server.utils.todo_store import get_store
+from mcp_server.utils.todo_codec import compare_token_cost
 
-# === 외부 도구 ===
-from mcp_server.tools import (
-    parse_pdf, summarize_text, generate_feedback,
-    export_report, export_to_notion
-)
+# === 외부 도구 === (레지스트리는 지연 로딩: 각 도구 모듈은 처음 쓸 때 import)
+from mcp_server.tools import TOOLS, STREAM_TOOLS
+from mcp_server.jobs import get_queue
 
 # ------------------------
 # 경로/스토리지 설정
@@ -24,7 +24,6 @@ GUIDE_DIR = APP_ROOT / "storage" / "guide"
 TODO_DIR.mkdir(parents=True, exist_ok=True)
 KPI_STORAGE_ROOT.mkdir(parents=True, exist_ok=True)
 GUIDE_DIR.mkdir(parents=True, exist_ok=True)
-TODO_FILE = TODO_DIR / "todo_list.json"
 
 # .env 로드
 load_dotenv()
@@ -43,40 +42,44 @@ def ensure_unique_name(dirpath: Path, filename: str) -> str:
         counter += 1
     return candidate
 
-def load_all_tasks():
-    if not TODO_FILE.exists():
-        return []
+def load_all_tasks(month: str = None):
+    """할 일 목록을 저장소에서 읽습니다. month(YYYY-MM)가 주어지면 해당 월만 조회합니다."""
     try:
-        with open(TODO_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # 과거 주차 구조 → 평탄화
-        if isinstance(data, list) and data and isinstance(data[0], dict) and "week" in data[0]:
-            flat = []
-            for wk in data:
-                if isinstance(wk, dict) and isinstance(wk.get("tasks"), list):
-                    flat.extend(wk["tasks"])
-            data = flat
-
-        tasks = data if isinstance(data, list) else []
-
-        # id 보정
-        changed = False
-        for t in tasks:
-            if isinstance(t, dict) and "id" not in t:
-                t["id"] = str(uuid.uuid4())
-                changed = True
-
-        if changed:
-            save_all_tasks(tasks)
-
-        return tasks
+        return get_store().list_tasks(month)
     except Exception:
         return []
 
 def save_all_tasks(all_tasks):
-    with open(TODO_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_tasks, f, ensure_ascii=False, indent=2)
+    # 전체 교체. 단건 변경은 get_store().add/update/delete를 사용하세요.
+    get_store().replace_all(all_tasks)
+
+def get_task_snapshot():
+    """
+    할 일 스냅샷을 반환합니다.
+    저장소의 쓰기 버전이 이전 스냅샷과 같으면 다시 읽지 않고 세션에 보관된 것을 그대로 씁니다.
+    월별 목록은 snapshot_tasks()로 처음 필요할 때 그 달 것만 읽습니다.
+    Returns:
+        dict: {"version", "months": 최신순 월 목록, "by_month": {월: [task, ...]} (지연 로딩)}
+    """
+    store = get_store()
+    version = store.version()
+    snapshot = st.session_state.get("_task_snapshot")
+    if snapshot is not None and snapshot["version"] == version:
+        return snapshot
+
+    snapshot = {
+        "version": version,
+        "months": store.list_months(),
+        "by_month": {},
+    }
+    st.session_state["_task_snapshot"] = snapshot
+    return snapshot
+
+def snapshot_tasks(snapshot, month: str):
+    """스냅샷에서 해당 월의 할 일을 반환합니다. 처음 요청된 월만 저장소에서 읽습니다."""
+    if month not in snapshot["by_month"]:
+        snapshot["by_month"][month] = load_all_tasks(month)
+    return snapshot["by_month"][month]
 
 def truncate_text(text, max_lines=3):
     if not isinstance(text, str):
@@ -86,6 +89,52 @@ def truncate_text(text, max_lines=3):
         return '\n'.join(lines[:max_lines]) + '\n...'
     return text
 
+# ------------------------
+# 백그라운드 작업 (오래 걸리는 도구는 작업 큐에서 실행하고 화면은 계속 사용)
+# ------------------------
+JOB_POLL_SECONDS = 1.0
+
+def start_job(state_key: str, tool: str, **args):
+    """도구 호출을 작업 큐에 등록하고 job id를 st.session_state[state_key]에 저장합니다."""
+    try:
+        job = get_queue().submit(tool, args)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    st.session_state[state_key] = job["id"]
+    return {"status": "success", "job": job}
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_status_panel(state_key: str, label: str):
+    """
+    작업 진행 상태와 취소 버튼을 보여 줍니다. fragment라서 이 영역만 주기적으로 다시 그립니다.
+    작업이 끝나면 도구 결과를 st.session_state[f"{state_key}_result"]에 넣고 앱 전체를 다시 실행합니다.
+    """
+    job_id = st.session_state.get(state_key)
+    if not job_id:
+        return
+    res = get_queue().result_response(job_id)
+    if res.get("status") == "pending":
+        info_col, cancel_col = st.columns([4, 1])
+        info_col.info(f"{label} 진행 중... ({res['job_status']})")
+        if cancel_col.button("취소", key=f"{state_key}_cancel"):
+            job = get_queue().cancel(job_id) or {}
+            if job.get("message"):
+                st.session_state[f"{state_key}_notice"] = job["message"]
+        if st.session_state.get(f"{state_key}_notice"):
+            st.caption(st.session_state[f"{state_key}_notice"])
+        return
+
+    st.session_state.pop(state_key, None)
+    st.session_state.pop(f"{state_key}_notice", None)
+    if res.get("job_status") == "succeeded":
+        result = res["result"]
+    elif res.get("job_status") == "cancelled":
+        result = {"status": "error", "message": "작업이 취소되었습니다."}
+    else:
+        result = res.get("result") or {"status": "error", "message": res.get("error") or res.get("message")}
+    st.session_state[f"{state_key}_result"] = result
+    st.rerun()
+
 # ------------------------
 # Streamlit UI
 # ------------------------
@@ -102,9 +151,11 @@ for key, default in [
     if key not in st.session_state:
         st.session_state[key] = default
 
+# 이번 렌더에서 사용할 할 일 스냅샷 (변경이 없으면 저장소를 다시 읽지 않음)
+task_snapshot = get_task_snapshot()
+
 # 월 셀렉터
-all_tasks_for_months = load_all_tasks()
-months = sorted({t.get("date","")[:7] for t in all_tasks_for_months if t.get("date")}, reverse=True)
+months = list(task_snapshot["months"])
 current_month = datetime.now().strftime("%Y-%m")
 if current_month not in months:
     months = [current_month] + months
@@ -173,15 +224,13 @@ if st.session_state.active_tab == "할 일 관리":
             st.warning("할 일을 입력하세요.")
             return
 
-        all_tasks = load_all_tasks()
-
         # 선택된 날짜 (YYYY-MM-DD)
         selected_date = st.session_state.bulk_task_date
         # 현재 시간 붙이기
         now_time = datetime.now().strftime("%H:%M:%S")
         full_datetime = f"{selected_date.strftime('%Y-%m-%d')} {now_time}"
 
-        all_tasks.append({
+        get_store().add({
             "id": str(uuid.uuid4()),
             "task": val,
             "status": "pending",
@@ -189,7 +238,6 @@ if st.session_state.active_tab == "할 일 관리":
             "date": full_datetime,   # ✅ YYYY-MM-DD hh:mm:ss 저장
         })
 
-        save_all_tasks(all_tasks)
         st.session_state.new_task_input = ""  # 입력창 초기화
         st.success(f"[{full_datetime}] 할 일이 추가되었습니다.")
 
@@ -217,7 +265,7 @@ if st.session_state.active_tab == "할 일 관리":
     st.subheader(f"{selected_month}의 할 일")
 
     # 현재 월의 할 일만 로드
-    tasks = [t for t in load_all_tasks() if t.get("date", "").startswith(selected_month)]
+    tasks = snapshot_tasks(task_snapshot, selected_month)
 
     if not tasks:
         st.info("현재 월의 할 일 없음")
@@ -227,10 +275,6 @@ if st.session_state.active_tab == "할 일 관리":
             tasks, key=lambda x: (x.get("date", ""), x.get("task", "")), reverse=True
         )
 
-        # 전체 원본(저장용) 로딩
-        all_items = load_all_tasks()
-        all_by_id = {x.get("id"): x for x in all_items}
-
         # === 상단 일괄 버튼 영역 직전 ===
         # 화면의 현재 선택 상태 추정
         all_selected_now = (
@@ -284,22 +328,18 @@ if st.session_state.active_tab == "할 일 관리":
             if not selected_ids:
                 st.warning("일괄 처리할 항목을 선택하세요.")
             else:
+                tasks_by_id = {x.get("id"): x for x in tasks_sorted}
                 changed = False
                 for t_id in selected_ids:
-                    item = all_by_id.get(t_id)
+                    item = tasks_by_id.get(t_id)
                     if not item:
                         continue
-                    # status 기본값 보정
-                    if "status" not in item or item["status"] not in ("pending", "done"):
-                        item["status"] = "pending"
-                    if item["status"] != target_status:
-                        item["status"] = target_status
-                        all_by_id[t_id] = item
+                    # 상태가 달라진 항목만 한 건씩 저장
+                    if item.get("status") != target_status:
+                        get_store().update(t_id, {"status": target_status}, month=selected_month)
                         changed = True
 
                 if changed:
-                    # 모든 아이템(현재 월 외 항목 포함)을 통째로 저장
-                    save_all_tasks(list(all_by_id.values()))
                     st.success(f"선택한 {len(selected_ids)}건을 '{target_status}' 상태로 변경했습니다.")
                 else:
                     st.info("변경할 상태가 없습니다.")
@@ -354,9 +394,7 @@ if st.session_state.active_tab == "할 일 관리":
                     with btn1:
                         if st.button("저장", key=f"save_date_{t_id}"):
                             old_time = (current_date.split(" ") + ["00:00:00"])[1]
-                            t["date"] = f"{new_dt.strftime('%Y-%m-%d')} {old_time}"
-                            all_by_id[t_id] = t
-                            save_all_tasks(list(all_by_id.values()))
+                            get_store().update(t_id, {"date": f"{new_dt.strftime('%Y-%m-%d')} {old_time}"}, month=selected_month)
                             st.success("날짜 변경 완료")
                             st.rerun()
                     with btn2:
@@ -368,14 +406,12 @@ if st.session_state.active_tab == "할 일 관리":
                 is_done = t.get("status") == "done"
                 toggle_label = "되돌리기" if is_done else "완료"
                 if st.button(toggle_label, key=f"done_{t_id}", help="상태 토글"):
-                    t["status"] = "pending" if is_done else "done"
-                    all_by_id[t_id] = t
-                    save_all_tasks(list(all_by_id.values()))
+                    get_store().update(t_id, {"status": "pending" if is_done else "done"}, month=selected_month)
                     st.rerun()
 
                 # 삭제
                 if st.button("삭제", key=f"del_{t_id}"):
-                    save_all_tasks([x for x in all_by_id.values() if x.get("id") != t_id])
+                    get_store().delete(t_id, month=selected_month)
                     st.warning("삭제됨")
                     st.rerun()
 
@@ -422,12 +458,28 @@ elif st.session_state.active_tab == "KPI 관리":
         col1, col2 = st.columns(2)
         with col1:
             if st.button("선택한 PDF 미리보기"):
-                with st.spinner("PDF 파싱 중..."):
-                    res = parse_pdf.run(filename=selected_pdf)
-                if res.get("status") == "success":
-                    st.text_area("PDF 내용 미리보기", value=res.get("text", ""), height=300)
-                else:
-                    st.error(f"PDF 파싱 오류: {res.get('message', '알 수 없는 오류')}")
+                # 페이지가 추출되는 대로 미리보기를 갱신
+                progress = st.empty()
+                preview = st.empty()
+                extracted = []
+                for event in STREAM_TOOLS["parse_pdf"](filename=selected_pdf):
+                    if event.get("status") == "page":
+                        if event.get("text"):
+                            extracted.append(event["text"])
+                        progress.caption(f"PDF 파싱 중... ({event['page']}/{event['total']} 페이지)")
+                        preview.text_area(
+                            "PDF 내용 미리보기",
+                            value="\n".join(extracted),
+                            height=300,
+                            key=f"pdf_preview_{event['page']}",
+                        )
+                    elif event.get("status") == "error":
+                        progress.empty()
+                        st.error(f"PDF 파싱 오류: {event.get('message', '알 수 없는 오류')}")
+                    else:
+                        progress.empty()
+                        if not extracted:
+                            preview.text_area("PDF 내용 미리보기", value="[추출 실패: 파일에 텍스트가 없음]", height=300)
         with col2:
             if st.button("대표 KPI 파일로 지정"):
                 if not selected_pdf:
@@ -449,35 +501,56 @@ elif st.session_state.active_tab == "월별 피드백":
     # 상태/메시지 영역 (항상 같은 위치에 하나만)
     fb_status = st.empty()
 
-    # KPI 요약 생성
-    if st.button("KPI 요약본 생성"):
+    use_llm_cache = st.checkbox(
+        "LLM 응답 캐시 사용",
+        value=True,
+        key="use_llm_cache",
+        help="같은 입력으로 다시 생성하면 저장된 응답을 바로 사용합니다. 새 초안이 필요하면 해제하세요.",
+    )
+
+    # KPI 요약 결과 (작업이 끝난 뒤 다시 그려질 때 반영)
+    sum_res = st.session_state.pop("kpi_job_result", None)
+    if sum_res:
+        if sum_res.get("status") == "success":
+            st.session_state.kpi_summary = sum_res.get("summary", "")
+            fb_status.success("KPI 요약 완료")
+        else:
+            fb_status.error(f"요약 오류: {sum_res.get('message', '요약 실패')}")
+
+    # KPI 요약 생성 (요약은 작업 큐에서 실행되어 기다리는 동안에도 화면을 쓸 수 있음)
+    if st.button("KPI 요약본 생성", disabled=bool(st.session_state.get("kpi_job"))):
         # Always try to use the designated KPI file
         with st.spinner("대표 KPI 파일 파싱 중..."):
-            parse_res = parse_pdf.run(filename='@designated')
+            parse_res = TOOLS["parse_pdf"](filename='@designated')
         
         if parse_res.get("status") != "success":
             fb_status.error(f"대표 KPI 파일 파싱 오류: {parse_res.get('message', '파싱 실패')}")
         else:
             kpi_text = parse_res.get("text", "")
-            with st.spinner("요약 생성 중..."):
-                sum_res = summarize_text.run(text_to_summarize=kpi_text)
-            if sum_res.get("status") == "success":
-                st.session_state.kpi_summary = sum_res.get("summary", "")
-                fb_status.success("KPI 요약 완료")
-            else:
-                fb_status.error(f"요약 오류: {sum_res.get('message', '요약 실패')}")
+            job_res = start_job("kpi_job", "summarize_text", text_to_summarize=kpi_text, use_cache=use_llm_cache)
+            if job_res["status"] == "error":
+                fb_status.error(f"요약 작업 등록 실패: {job_res['message']}")
+
+    if st.session_state.get("kpi_job"):
+        job_status_panel("kpi_job", "KPI 요약 생성")
 
     st.text_area("KPI 요약본", value=st.session_state.get("kpi_summary") or "", height=200)
 
-    # 피드백 보고서 생성
+    # 피드백 보고서 생성 (요청만 준비하고, 실제 생성은 아래 보고서 영역에 스트리밍)
+    report_request = None
     if st.button("피드백 보고서 생성"):
-        tasks = [t for t in load_all_tasks() if t.get("date","").startswith(st.session_state.selected_month)]
+        tasks = snapshot_tasks(task_snapshot, st.session_state.selected_month)
         if not tasks:
             fb_status.error("현재 월의 할 일 없음")
         elif not st.session_state.get("kpi_summary"):
             fb_status.error("KPI 요약본 먼저 생성하세요.")
         else:
-            todos_json = json.dumps(tasks, ensure_ascii=False, indent=2)
+            # 리스트로 넘기면 서버에서 압축 형식 변환과 토큰 예산 축약을 적용함
+            cost = compare_token_cost(tasks)
+            st.caption(
+                f"할 일 {len(tasks)}건 · 약 {cost['compact_tokens']} 토큰 "
+                f"(JSON 형식 약 {cost['json_tokens']} 토큰)"
+            )
             
             # Load template content if it exists
             template_content = ""
@@ -490,30 +563,44 @@ elif st.session_state.active_tab == "월별 피드백":
             except FileNotFoundError:
                 pass # Template is optional
 
-            with st.spinner("보고서 생성 중..."):
-                rep_res = generate_feedback.run(
-                    month=st.session_state.selected_month,
-                    todos=todos_json,
-                    kpi_summary=st.session_state.kpi_summary,
-                    template=template_content # Pass the template content
-                )
-            if rep_res.get("status") == "success":
-                st.session_state.generated_report = rep_res.get("content", "")
-                fb_status.success("보고서 생성 완료")
-            else:
-                fb_status.error(f"보고서 오류: {rep_res.get('message', '보고서 생성 실패')}")
+            report_request = dict(
+                month=st.session_state.selected_month,
+                todos=tasks,
+                kpi_summary=st.session_state.kpi_summary,
+                template=template_content, # Pass the template content
+                use_cache=use_llm_cache,
+            )
 
     st.markdown("---")
     st.subheader("생성된 보고서")
-    report_content = st.session_state.get("generated_report") or "*보고서가 아직 생성되지 않았습니다.*"
     with st.container(border=True):
-        st.markdown(report_content)
+        report_view = st.empty()
+
+    if report_request:
+        # 토큰이 도착하는 대로 보고서 영역을 갱신
+        streamed = ""
+        report_view.markdown("*보고서 생성 중...*")
+        for event in STREAM_TOOLS["generate_feedback"](**report_request):
+            if event.get("status") == "delta":
+                streamed += event.get("text", "")
+                report_view.markdown(streamed + "▌")
+            elif event.get("status") == "success":
+                st.session_state.generated_report = event.get("content", "")
+                budget = event.get("budget") or {}
+                if budget.get("applied"):
+                    fb_status.warning(
+                        f"보고서 생성 완료 · 입력이 토큰 예산({budget['budget']})을 넘어 축약함: "
+                        + ", ".join(budget["applied"])
+                    )
+                else:
+                    fb_status.success("보고서 생성 완료")
+            else:
+                fb_status.error(f"보고서 오류: {event.get('message', '보고서 생성 실패')}")
 
-    colA, colB, colC = st.columns(3)
+    report_content = st.session_state.get("generated_report") or "*보고서가 아직 생성되지 않았습니다.*"
+    report_view.markdown(report_content)
 
-    # 진행 플래그 초기화 (중복 방지)
-    if "is_exporting_notion" not in st.session_state:
-        st.session_state["is_exporting_notion"] = False
+    colA, colB, colC = st.columns(3)
 
     with colA:
         generated_report = st.session_state.get("generated_report")
@@ -526,21 +613,35 @@ elif st.session_state.active_tab == "월별 피드백":
             help="보고서를 먼저 생성해야 다운로드할 수 있습니다."
         )
 
-    # ✅ 단일 버튼 + 2단계 처리 (placeholder 사용/이중 렌더 제거)
+    # 업로드는 작업 큐에서 실행 (진행 중에는 버튼 비활성화로 중복 방지)
     with colB:
         export_clicked = st.button(
             "Notion으로 내보내기",
-            disabled=st.session_state["is_exporting_notion"],
+            disabled=bool(st.session_state.get("notion_job")),
             key="btn_export_notion",
             help="생성된 보고서를 Notion 페이지로 업로드합니다."
         )
+        st.checkbox(
+            "변경분만 동기화",
+            value=True,
+            key="notion_sync_mode",
+            help="이 달에 이미 올린 페이지가 있으면 새 페이지를 만들지 않고 바뀐 블록만 반영합니다."
+        )
         if export_clicked:
             if not st.session_state.get("generated_report"):
                 fb_status.error("생성된 보고서 없음")
             else:
-                # 1단계: 플래그만 켜고 즉시 재실행 → 다음 렌더에서 실제 업로드
-                st.session_state["is_exporting_notion"] = True
-                st.rerun()
+                job_res = start_job(
+                    "notion_job",
+                    "export_to_notion",
+                    month=st.session_state.selected_month,
+                    content=st.session_state.generated_report,
+                    mode="sync" if st.session_state.get("notion_sync_mode", True) else "full",
+                )
+                if job_res["status"] == "error":
+                    fb_status.error(f"Notion 작업 등록 실패: {job_res['message']}")
+                else:
+                    st.rerun()
 
     with colC:
         try:
@@ -552,26 +653,24 @@ elif st.session_state.active_tab == "월별 피드백":
                 unsafe_allow_html=True
             )
 
-    # 2단계: 실제 업로드 수행 구간 (버튼 밖에서, 렌더 1회에 딱 한 번만 실행)
-    if st.session_state.get("is_exporting_notion"):
-        with st.spinner("Notion 업로드 중..."):
-            res = export_to_notion.run(
-                month=st.session_state.selected_month,
-                content=st.session_state.generated_report
-            )
-
-        # 업로드 종료 → 버튼 다시 활성화
-        st.session_state["is_exporting_notion"] = False
+    # 업로드 진행 상태와 결과
+    if st.session_state.get("notion_job"):
+        job_status_panel("notion_job", "Notion 업로드")
 
+    res = st.session_state.pop("notion_job_result", None)
+    if res:
         if res.get("status") == "success":
             st.toast("Notion 내보내기 완료!", icon="🎉")
-            fb_status.success(f"업로드 완료: {res.get('url')}")
+            if res.get("mode") == "sync" and not res.get("created"):
+                fb_status.success(
+                    f"동기화 완료: {res.get('url')} "
+                    f"(추가 {res['inserted']}, 수정 {res['updated']}, 삭제 {res['deleted']})"
+                )
+            else:
+                fb_status.success(f"업로드 완료: {res.get('url')}")
         else:
             fb_status.error(f"Notion 오류: {res.get('message', '업로드 실패')}")
 
-        # 최종 상태 반영을 위해 1회 재렌더
-        st.rerun()
-
 
 elif st.session_state.active_tab == "템플릿 관리":
     st.header("월간 피드백 템플릿 관리")
@@ -640,7 +739,8 @@ elif st.session_state.active_tab == "LLM 채팅":
                 # Execute one step of the agent
 
                 # 교체: 반환 개수에 따라 유연 언패킹
-                result = agent_step(st.session_state.llm_messages, st.session_state.llm_context)
+                # 모델 호출은 전역 LLM 이벤트 루프에서 세마포어/재시도/제한 시간을 거쳐 실행됩니다.
+                result = run_agent_step(st.session_state.llm_messages, st.session_state.llm_context)
 
                 # 기본값
                 wip_content = None
@@ -651,9 +751,9 @@ elif st.session_state.active_tab == "LLM 채팅":
                         if len(result) >= 5:
                             wip_content = result[4]
                     else:
-                        raise RuntimeError(f"agent_step 반환값 개수가 예상보다 적습니다: {len(result)}")
+                        raise RuntimeError(f"run_agent_step 반환값 개수가 예상보다 적습니다: {len(result)}")
                 else:
-                    raise RuntimeError("agent_step 반환값이 tuple/list가 아닙니다.")
+                    raise RuntimeError("run_agent_step 반환값이 tuple/list가 아닙니다.")
 
 
                 # Update state for the next iteration
@@ -0,0 +1,310 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from .tools import TOOLS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOB_DIR = os.path.normpath(os.path.join(BASE_DIR, "../storage/jobs"))
+JOB_DB = os.path.join(JOB_DIR, "jobs.sqlite3")
+
+# 동시에 실행할 작업 수
+MCP_JOB_WORKERS = int(os.getenv("MCP_JOB_WORKERS", "2"))
+# 대기열에 쌓아둘 수 있는 최대 작업 수 (초과 시 제출 거부)
+MCP_JOB_MAX_QUEUED = int(os.getenv("MCP_JOB_MAX_QUEUED", "100"))
+# 끝난 작업을 보관하는 기간(일)
+MCP_JOB_RETENTION_DAYS = float(os.getenv("MCP_JOB_RETENTION_DAYS", "7"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+def _read_boot_id() -> str:
+    """재부팅마다 바뀌는 ID (재부팅 후 같은 pid가 다른 프로세스에 재사용되는 경우를 구분). 알 수 없으면 빈 문자열."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+BOOT_ID = _read_boot_id()
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # Windows의 os.kill은 프로세스를 종료시키므로 핸들로만 확인합니다.
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _owner_alive(pid, boot_id) -> bool:
+    """작업을 등록한 프로세스가 아직 실행 중인지. 소유자 기록이 없는 옛 작업은 주인이 없는 것으로 봅니다."""
+    if pid is None:
+        return False
+    if BOOT_ID and boot_id and boot_id != BOOT_ID:
+        return False
+    return _pid_alive(int(pid))
+
+
+class JobQueue:
+    """
+    오래 걸리는 도구 호출을 백그라운드에서 실행하는 작업 큐.
+    - 작업 상태/결과는 SQLite(storage/jobs)에 저장되어 서버를 다시 시작해도 남습니다.
+    - 실행은 MCP_JOB_WORKERS개 스레드로 제한합니다.
+    - 대기 중인 작업은 바로 취소됩니다. 실행 중인 작업은 도구를 중간에 멈출 수 없어 끝까지 실행되고,
+      끝난 뒤 결과를 버리고 cancelled로 표시합니다 (Notion 업로드 등 부수 효과는 그대로 남습니다).
+    - 같은 DB를 여러 프로세스(서버, MCP_EXECUTOR=inprocess인 GUI)가 함께 쓰므로 작업마다 소유 프로세스(pid, boot id)를 기록하고,
+      각 프로세스는 자기 작업만 실행/취소하며 recover()는 소유 프로세스가 종료된 작업만 넘겨받습니다.
+    """
+
+    def __init__(self, db_path: str = JOB_DB, workers: int = MCP_JOB_WORKERS):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mcp-job")
+        self._futures = {}
+        self._cancel_requested = set()
+        self._lock = threading.Lock()
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        """트랜잭션(성공 시 커밋, 오류 시 롤백)으로 감싼 연결. 블록이 끝나면 연결을 닫습니다."""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    tool TEXT NOT NULL,
+                    args TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner_pid INTEGER,
+                    owner_boot TEXT
+                )"""
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, ctype in (("owner_pid", "INTEGER"), ("owner_boot", "TEXT")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {ctype}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+
+    @staticmethod
+    def _from_row(row, with_result: bool = False) -> dict:
+        job = {k: row[k] for k in ("id", "tool", "status", "error", "created_at", "started_at", "finished_at", "owner_pid")}
+        job["args"] = json.loads(row["args"])
+        if with_result:
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    def _set(self, job_id: str, **fields) -> None:
+        columns = ", ".join(f"{k} = ?" for k in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    # ---- 실행 ----
+    def _run(self, job_id: str, tool: str, args: dict) -> None:
+        with self._lock:
+            cancelled = job_id in self._cancel_requested
+            if cancelled:
+                self._cancel_requested.discard(job_id)
+                self._futures.pop(job_id, None)
+        if cancelled:
+            self._set(job_id, status=CANCELLED, finished_at=time.time())
+            return
+        self._set(job_id, status=RUNNING, started_at=time.time())
+        try:
+            result = TOOLS[tool](**args)
+            error = result.get("message") if isinstance(result, dict) and result.get("status") == "error" else None
+        except Exception as e:
+            result, error = None, str(e)
+
+        with self._lock:
+            cancelled = job_id in self._cancel_requested
+            self._cancel_requested.discard(job_id)
+            self._futures.pop(job_id, None)
+        if cancelled:
+            self._set(job_id, status=CANCELLED, finished_at=time.time())
+            return
+        self._set(
+            job_id,
+            status=FAILED if error else SUCCEEDED,
+            result=json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+            error=error,
+            finished_at=time.time(),
+        )
+
+    def _dispatch(self, job_id: str, tool: str, args: dict) -> None:
+        with self._lock:
+            self._futures[job_id] = self._pool.submit(self._run, job_id, tool, args)
+
+    # ---- 공개 API ----
+    def submit(self, tool: str, args: dict = None) -> dict:
+        """작업을 등록하고 바로 반환합니다. 알 수 없는 도구나 대기열 초과 시 ValueError."""
+        if tool not in TOOLS:
+            raise ValueError(f"Unknown tool: {tool}")
+        args = args or {}
+        with self._connect() as conn:
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+            if queued >= MCP_JOB_MAX_QUEUED:
+                raise ValueError(f"대기 중인 작업이 너무 많습니다 (최대 {MCP_JOB_MAX_QUEUED}개).")
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, tool, args, status, created_at, owner_pid, owner_boot) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, tool, json.dumps(args, ensure_ascii=False), QUEUED, time.time(), os.getpid(), BOOT_ID),
+            )
+        self._dispatch(job_id, tool, args)
+        return self.get(job_id)
+
+    def get(self, job_id: str, with_result: bool = False):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._from_row(row, with_result) if row else None
+
+    def result_response(self, job_id: str) -> dict:
+        """결과 조회 응답. 끝난 작업이면 도구 결과를, 아니면 현재 상태만 담습니다."""
+        job = self.get(job_id, with_result=True)
+        if job is None:
+            return {"status": "error", "message": f"Unknown job: {job_id}"}
+        if job["status"] not in FINISHED:
+            return {"status": "pending", "job_status": job["status"]}
+        return {"status": "success", "job_status": job["status"], "result": job["result"], "error": job["error"]}
+
+    def list_jobs(self, status: str = None, limit: int = 50) -> list:
+        sql, params = "SELECT * FROM jobs", []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(int(limit))
+        with self._connect() as conn:
+            return [self._from_row(r) for r in conn.execute(sql, params).fetchall()]
+
+    def cancel(self, job_id: str):
+        """
+        작업을 취소합니다. 이미 끝난 작업이면 상태를 바꾸지 않습니다.
+        대기 중인 작업은 실행되지 않고 바로 cancelled가 됩니다.
+        실행 중인 작업은 멈추지 않고 끝까지 실행된 뒤 결과만 버려집니다 (응답의 cancel_requested=True, message 참고).
+        """
+        job = self.get(job_id)
+        if job is None or job["status"] in FINISHED:
+            return job
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is None or future.done():
+                # 방금 끝났거나 다른 프로세스가 실행하는 작업
+                job = self.get(job_id)
+                if job["status"] not in FINISHED:
+                    job["cancel_requested"] = False
+                    job["message"] = "이 프로세스에서 실행 중인 작업이 아니라 취소할 수 없습니다. 작업을 등록한 프로세스에서 취소하세요."
+                return job
+            not_started = future.cancel()
+            if not_started:
+                self._futures.pop(job_id, None)
+            else:
+                self._cancel_requested.add(job_id)
+        if not_started:
+            self._set(job_id, status=CANCELLED, finished_at=time.time())
+        job = self.get(job_id)
+        job["cancel_requested"] = not not_started
+        if not not_started:
+            job["message"] = "실행 중인 작업은 중단되지 않습니다. 끝나면 결과를 버리고 cancelled로 표시합니다."
+        return job
+
+    def recover(self) -> dict:
+        """
+        서버 시작 시 호출합니다.
+        소유 프로세스가 종료된 작업만 넘겨받습니다 (다른 살아 있는 프로세스의 작업은 건드리지 않음).
+        - 실행 중이던 작업은 중단된 것으로 보고 failed
+        - 대기 중이던 작업은 이 프로세스 소유로 바꿔 다시 실행 대기열에 넣음
+        보관 기간이 지난 완료 작업은 삭제합니다.
+        """
+        now = time.time()
+        me = (os.getpid(), BOOT_ID)
+        interrupted, requeued = 0, []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, tool, args, status, owner_pid, owner_boot FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING),
+            ).fetchall()
+            purged = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED))}) AND finished_at < ?",
+                (*FINISHED, now - MCP_JOB_RETENTION_DAYS * 86400),
+            ).rowcount
+
+        with self._lock:
+            mine = set(self._futures)
+        for row in rows:
+            owner = (row["owner_pid"], row["owner_boot"])
+            if owner == me and row["id"] in mine:
+                continue
+            if owner != me and _owner_alive(*owner):
+                continue
+            # 소유자 조건을 함께 걸어, 여러 프로세스가 동시에 recover해도 한 곳만 넘겨받습니다.
+            with self._connect() as conn:
+                if row["status"] == RUNNING:
+                    claimed = conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                        "WHERE id = ? AND status = ? AND owner_pid IS ? AND owner_boot IS ?",
+                        (FAILED, "작업을 실행하던 프로세스가 종료되어 중단되었습니다.", now, row["id"], RUNNING, *owner),
+                    ).rowcount
+                    interrupted += claimed
+                    continue
+                claimed = conn.execute(
+                    "UPDATE jobs SET owner_pid = ?, owner_boot = ? "
+                    "WHERE id = ? AND status = ? AND owner_pid IS ? AND owner_boot IS ?",
+                    (*me, row["id"], QUEUED, *owner),
+                ).rowcount
+            if claimed:
+                requeued.append(row)
+
+        for row in requeued:
+            self._dispatch(row["id"], row["tool"], json.loads(row["args"]))
+        if interrupted or requeued or purged:
+            print(f"[jobs] 복구: 재실행 {len(requeued)}건, 중단 처리 {interrupted}건, 삭제 {purged}건")
+        return {"requeued": len(requeued), "interrupted": interrupted, "purged": purged}
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_queue() -> JobQueue:
+    """프로세스 전역 작업 큐 인스턴스를 반환합니다."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
@@ -1,4 +1,18 @@
-from pydantic import BaseModel
+from typing import List
+from pydantic import BaseModel, Field
 
 class ToolRequest(BaseModel):
     args: dict
+
+class BatchItem(BaseModel):
+    tool: str
+    args: dict = Field(default_factory=dict)
+    # 먼저 끝나야 하는 앞선 항목의 인덱스 (순서만 보장하며 결과를 인자로 넘기지는 않음)
+    depends_on: List[int] = Field(default_factory=list)
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+
+class JobRequest(BaseModel):
+    tool: str
+    args: dict = Field(default_factory=dict)
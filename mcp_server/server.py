@@ -1,17 +1,174 @@
+import os
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
 from fastapi import FastAPI
-from .schemas import ToolRequest
-from .tools import TOOLS
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from .schemas import ToolRequest, BatchRequest, JobRequest
+from .tools import TOOLS, ASYNC_TOOLS, STREAM_TOOLS, import_report
+from .jobs import get_queue
 
-app = FastAPI()
+# 배치 실행 설정
+# - 요청 하나에 담을 수 있는 최대 호출 수
+MCP_BATCH_MAX_ITEMS = int(os.getenv("MCP_BATCH_MAX_ITEMS", "32"))
+# - CPU를 많이 쓰는 도구는 스레드 대신 프로세스 풀에서 실행합니다.
+BATCH_PROCESS_TOOLS = {"parse_pdf"}
+MCP_BATCH_PROCESS_WORKERS = int(os.getenv("MCP_BATCH_PROCESS_WORKERS", "0")) or (os.cpu_count() or 1)
+
+_process_pool = None
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=MCP_BATCH_PROCESS_WORKERS)
+    return _process_pool
+
+def _run_in_process(tool_name: str, args: dict):
+    # 자식 프로세스에서 실행되는 함수 (레지스트리가 필요한 모듈만 import)
+    from .tools import TOOLS as tools
+    return tools[tool_name](**args)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 시작: 이전 실행에서 남은 대기 작업을 다시 큐에 넣습니다.
+    get_queue().recover()
+    yield
+    # 종료: 프로세스 풀과 작업 큐를 정리합니다.
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+    get_queue().shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.get("/tools")
+def list_tools():
+    """등록된 도구 목록과, 지금까지 로드된 도구 모듈의 import 시간(ms)."""
+    return {
+        "tools": sorted(TOOLS),
+        "async_tools": sorted(ASYNC_TOOLS),
+        "stream_tools": sorted(STREAM_TOOLS),
+        "import_ms": import_report(),
+    }
+
+async def _run_batch_item(index: int, item, previous: list) -> dict:
+    started = time.perf_counter()
+    record = {"index": index, "tool": item.tool}
+
+    # 의존 항목이 모두 성공해야 실행합니다.
+    deps = [previous[d] for d in item.depends_on]
+    for dep in deps:
+        await dep
+    failed = [d for d, dep in zip(item.depends_on, deps) if dep.result()["status"] != "success"]
+    if failed:
+        return {**record, "status": "skipped", "result": {"status": "error", "message": f"의존 항목 실패: {failed}"}, "elapsed": 0.0}
+
+    if item.tool not in TOOLS:
+        result = {"status": "error", "message": f"Unknown tool: {item.tool}"}
+    else:
+        try:
+            if item.tool in ASYNC_TOOLS:
+                result = await ASYNC_TOOLS[item.tool](**item.args)
+            elif item.tool in BATCH_PROCESS_TOOLS:
+                # 배치 안에서는 프로세스 풀을 공유하므로 도구 내부 병렬 추출은 끕니다.
+                args = {"workers": 1, **item.args}
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(_get_process_pool(), _run_in_process, item.tool, args)
+            else:
+                result = await run_in_threadpool(TOOLS[item.tool], **item.args)
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+
+    status = "error" if not isinstance(result, dict) or result.get("status") == "error" else "success"
+    return {**record, "status": status, "result": result, "elapsed": round(time.perf_counter() - started, 3)}
+
+# /tools/{tool_name} 보다 먼저 등록해야 'batch'가 도구 이름으로 해석되지 않습니다.
+@app.post("/tools/batch")
+async def run_batch(req: BatchRequest):
+    """
+    여러 도구 호출을 한 번의 요청으로 실행합니다.
+    의존 관계가 없는 항목은 동시에 실행되며(I/O 도구는 스레드, parse_pdf는 프로세스 풀, LLM 도구는 이벤트 루프),
+    결과는 요청 순서대로 항목별 status와 함께 반환됩니다.
+    """
+    if len(req.items) > MCP_BATCH_MAX_ITEMS:
+        return {"status": "error", "message": f"배치 항목은 최대 {MCP_BATCH_MAX_ITEMS}개까지 가능합니다."}
+    for i, item in enumerate(req.items):
+        if any(not 0 <= d < i for d in item.depends_on):
+            return {"status": "error", "message": f"{i}번 항목의 depends_on은 앞선 항목의 인덱스만 가리킬 수 있습니다."}
+
+    tasks = []
+    for i, item in enumerate(req.items):
+        tasks.append(asyncio.ensure_future(_run_batch_item(i, item, tasks)))
+    results = await asyncio.gather(*tasks)
+    return {"status": "success", "results": list(results)}
 
 @app.post("/tools/{tool_name}")
-def run_tool(tool_name: str, req: ToolRequest):
+async def run_tool(tool_name: str, req: ToolRequest):
     if tool_name not in TOOLS:
         return {"status": "error", "message": f"Unknown tool: {tool_name}"}
 
     # args 딕셔너리를 툴 run 함수에 언팩 전달
+    # LLM 호출 툴은 run_async로 이벤트 루프에서 대기하고, 나머지는 스레드풀에서 실행
     try:
-        result = TOOLS[tool_name](**req.args)
+        if tool_name in ASYNC_TOOLS:
+            result = await ASYNC_TOOLS[tool_name](**req.args)
+        else:
+            result = await run_in_threadpool(TOOLS[tool_name], **req.args)
         return result
     except Exception as e:
         return {"status": "error", "message": str(e)}
+
+# ---- 백그라운드 작업 ----
+@app.post("/jobs")
+def submit_job(req: JobRequest):
+    """도구 호출을 작업으로 등록하고 바로 job id를 반환합니다."""
+    try:
+        return {"status": "success", "job": get_queue().submit(req.tool, req.args)}
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+@app.get("/jobs")
+def list_jobs(status: str = None, limit: int = 50):
+    return {"status": "success", "jobs": get_queue().list_jobs(status=status, limit=limit)}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = get_queue().get(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Unknown job: {job_id}"}
+    return {"status": "success", "job": job}
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    """끝난 작업이면 도구 결과를, 아니면 현재 상태만 반환합니다."""
+    return get_queue().result_response(job_id)
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = get_queue().cancel(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Unknown job: {job_id}"}
+    return {"status": "success", "job": job}
+
+def _sse(data: dict, event: str = None) -> str:
+    line = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return f"event: {event}\n{line}" if event else line
+
+@app.post("/tools/{tool_name}/stream")
+def stream_tool(tool_name: str, req: ToolRequest):
+    """툴의 stream 제너레이터 결과를 server-sent events로 하나씩 전달합니다."""
+    def events():
+        if tool_name not in STREAM_TOOLS:
+            yield _sse({"status": "error", "message": f"Streaming not supported: {tool_name}"})
+            yield _sse({}, event="end")
+            return
+        try:
+            for item in STREAM_TOOLS[tool_name](**req.args):
+                yield _sse(item)
+        except Exception as e:
+            yield _sse({"status": "error", "message": str(e)})
+        yield _sse({}, event="end")
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -1,26 +1,101 @@
+import ast
+import time
 import pkgutil
 import importlib
+import threading
 
 TOOLS = {}
+ASYNC_TOOLS = {}
+STREAM_TOOLS = {}
 DESCRIPTIONS = []
 
+# 도구 모듈별 최초 import 소요 시간(초)
+IMPORT_TIMES = {}
+
 # 현재 패키지(mcp_server.tools) 내의 모든 모듈 탐색
 package = __name__
 
+_import_lock = threading.Lock()
+
+def _load(module_name: str):
+    """도구 모듈을 처음 호출될 때 import 하고 소요 시간을 기록합니다."""
+    module_path = f"{package}.{module_name}"
+    if module_name in IMPORT_TIMES:
+        return importlib.import_module(module_path)
+    with _import_lock:
+        started = time.perf_counter()
+        module = importlib.import_module(module_path)
+        if module_name not in IMPORT_TIMES:
+            IMPORT_TIMES[module_name] = time.perf_counter() - started
+            print(f"[tools] {module_name} 모듈 로드 {IMPORT_TIMES[module_name] * 1000:.1f}ms")
+    return module
+
+class _LazyTool:
+    """모듈을 import 하지 않고 등록해 두었다가, 첫 호출 시 모듈의 함수를 불러 실행합니다."""
+
+    def __init__(self, module_name: str, attr: str):
+        self.module_name = module_name
+        self.attr = attr
+        self.__name__ = f"{module_name}.{attr}"
+
+    def __call__(self, *args, **kwargs):
+        return getattr(_load(self.module_name), self.attr)(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<lazy tool {self.__name__}>"
+
+def _scan(module_name: str, path: str) -> dict:
+    """
+    모듈 소스를 import 하지 않고 AST로만 읽어
+    DESCRIPTION 문자열과 최상위 run / run_async / stream 함수 존재 여부를 찾습니다.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    found = {"functions": set(), "description": None}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            found["functions"].add(node.name)
+        elif isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "DESCRIPTION" for t in node.targets):
+            try:
+                found["description"] = ast.literal_eval(node.value)
+            except ValueError:
+                # 상수가 아닌 DESCRIPTION은 모듈을 읽어야 알 수 있습니다.
+                found["description"] = getattr(_load(module_name), "DESCRIPTION", None)
+    return found
+
 for loader, module_name, is_pkg in pkgutil.iter_modules(__path__):
-    if module_name == "__init__":
+    if module_name == "__init__" or is_pkg:
         continue
 
-    module = importlib.import_module(f"{package}.{module_name}")
+    found = _scan(module_name, loader.find_spec(module_name).origin)
 
     # run 함수가 있으면 툴로 등록
-    if hasattr(module, "run"):
-        TOOLS[module_name] = module.run
+    if "run" in found["functions"]:
+        TOOLS[module_name] = _LazyTool(module_name, "run")
+
+    # run_async 코루틴이 있으면 서버에서 이벤트 루프로 직접 실행
+    if "run_async" in found["functions"]:
+        ASYNC_TOOLS[module_name] = _LazyTool(module_name, "run_async")
+
+    # stream 함수(제너레이터)가 있으면 스트리밍 툴로 등록
+    if "stream" in found["functions"]:
+        STREAM_TOOLS[module_name] = _LazyTool(module_name, "stream")
 
     # DESCRIPTION이 있으면 설명서에 추가
-    if hasattr(module, "DESCRIPTION"):
-        DESCRIPTIONS.append(module.DESCRIPTION)
+    if found["description"]:
+        DESCRIPTIONS.append(found["description"])
 
 DESCRIPTIONS = "\n".join(DESCRIPTIONS)
 
-__all__ = ["TOOLS", "DESCRIPTIONS"]
+def preload(names=None) -> dict:
+    """도구 모듈을 미리 import 합니다 (예: 서버 시작 후 예열). 모듈별 import 시간을 반환합니다."""
+    for name in names or TOOLS:
+        _load(name)
+    return import_report()
+
+def import_report() -> dict:
+    """지금까지 로드된 도구 모듈별 import 시간(ms)."""
+    return {name: round(seconds * 1000, 1) for name, seconds in IMPORT_TIMES.items()}
+
+__all__ = ["TOOLS", "ASYNC_TOOLS", "STREAM_TOOLS", "DESCRIPTIONS", "IMPORT_TIMES", "preload", "import_report"]
@@ -1,9 +1,13 @@
 import os
 import re
+import json
+import hashlib
+from difflib import SequenceMatcher
 from dotenv import load_dotenv
-import notion_client
+from notion_client.errors import HTTPResponseError
+from ..utils import notion_api
 
-DESCRIPTION = "- export_to_notion(month: str, content: str): 생성된 보고서 내용을 Notion 페이지로 생성합니다."
+DESCRIPTION = "- export_to_notion(month: str, content: str, mode: str = 'full'): 생성된 보고서 내용을 Notion 페이지로 생성합니다. mode='sync'이면 같은 달에 이전에 올린 페이지에서 바뀐 블록만 추가/수정/삭제합니다."
 
 # .env 파일 로드
 load_dotenv()
@@ -12,6 +16,13 @@ NOTION_API_KEY = os.getenv("NOTION_API_KEY")
 NOTION_PAGE_ID = os.getenv("NOTION_PAGE_ID")
 NOTION_BLOCK_CHAR_LIMIT = 2000 # Notion API의 블록 당 글자 수 제한
 
+# 중간에 실패한 내보내기를 이어서 진행하기 위한 진행 상태 (월별)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NOTION_STATE_DIR = os.path.normpath(os.path.join(BASE_DIR, "../../storage/notion"))
+EXPORT_STATE_FILE = os.path.join(NOTION_STATE_DIR, "export_state.json")
+# mode="sync"용: 월별 페이지 ID와 페이지에 올라가 있는 블록(ID, 내용 해시) 목록
+SYNC_STATE_FILE = os.path.join(NOTION_STATE_DIR, "sync_state.json")
+
 def markdown_to_blocks(markdown_content: str):
     """마크다운 텍스트를 Notion 블록 리스트로 변환합니다. 인라인 서식(**)을 지원합니다."""
 
@@ -90,36 +101,270 @@ def markdown_to_blocks(markdown_content: str):
             })
     return blocks
 
-def run(month: str = None, content: str = None):
+def _load_state(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_state(path: str, state: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def _page_properties(month: str) -> dict:
+    return {"title": {"title": [{"text": {"content": f"{month} 월간 피드백 보고서"}}]}}
+
+def _export_blocks(month: str, content: str, blocks: list) -> dict:
+    """
+    첫 100개 블록으로 페이지를 만들고, 나머지는 100개씩 blocks.children.append로 붙입니다.
+    배치가 성공할 때마다 진행 상태를 저장하므로, 같은 내용을 다시 내보내면 실패한 지점부터 이어서 올립니다.
+    """
+    notion = notion_api.get_client()
+    states = _load_state(EXPORT_STATE_FILE)
+    digest = _content_hash(content)
+    state = states.get(month)
+
+    if state and state.get("content_hash") == digest and not state.get("done"):
+        # 응답을 받지 못한 마지막 배치가 실제로는 반영됐을 수 있으므로 페이지의 실제 블록 수에 맞춥니다.
+        state["sent"] = max(state["sent"], len(_list_child_ids(state["page_id"])))
+        print(f"[export_to_notion] 이전 내보내기 이어서 진행: {state['sent']}/{len(blocks)} 블록")
+    else:
+        first = blocks[:notion_api.NOTION_BATCH_SIZE]
+        page = notion_api.call(
+            notion.pages.create,
+            parent={"page_id": NOTION_PAGE_ID},
+            properties=_page_properties(month),
+            children=first,
+        )
+        state = {"content_hash": digest, "page_id": page["id"], "url": page.get("url"),
+                 "sent": len(first), "total": len(blocks), "done": False}
+        states[month] = state
+        _save_state(EXPORT_STATE_FILE, states)
+
+    remaining = blocks[state["sent"]:]
+    for batch in notion_api.batches(remaining):
+        notion_api.call(notion.blocks.children.append, block_id=state["page_id"], children=batch)
+        state["sent"] += len(batch)
+        _save_state(EXPORT_STATE_FILE, states)
+
+    state["done"] = True
+    _save_state(EXPORT_STATE_FILE, states)
+    return state
+
+def _block_hash(block: dict) -> str:
+    """
+    블록의 타입, 글자, 굵게 여부만으로 만든 해시.
+    Notion이 돌려주는 블록(plain_text, annotations 등이 채워짐)과 markdown_to_blocks 결과가 같은 값을 갖습니다.
+    """
+    btype = block["type"]
+    spans = [
+        ((r.get("text") or {}).get("content", r.get("plain_text", "")), bool((r.get("annotations") or {}).get("bold")))
+        for r in (block.get(btype) or {}).get("rich_text", [])
+    ]
+    return hashlib.sha256(json.dumps([btype, spans], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _block_entry(block_id: str, block: dict) -> dict:
+    return {"id": block_id, "type": block["type"], "hash": _block_hash(block)}
+
+def _list_children(page_id: str) -> list:
+    notion = notion_api.get_client()
+    children, cursor = [], None
+    while True:
+        params = {"block_id": page_id, "page_size": notion_api.NOTION_BATCH_SIZE}
+        if cursor:
+            params["start_cursor"] = cursor
+        res = notion_api.call(notion.blocks.children.list, **params)
+        children.extend(res.get("results", []))
+        if not res.get("has_more"):
+            return children
+        cursor = res.get("next_cursor")
+
+def _list_child_ids(page_id: str) -> list:
+    return [b["id"] for b in _list_children(page_id)]
+
+def _reload_sync_state(state: dict, states: dict) -> None:
+    """저장된 블록 목록을 버리고 페이지의 실제 블록으로 다시 만듭니다."""
+    state["blocks"] = [_block_entry(b["id"], b) for b in _list_children(state["page_id"])]
+    state.pop("pending_append", None)
+    _save_state(SYNC_STATE_FILE, states)
+
+def _page_exists(page_id: str) -> bool:
+    notion = notion_api.get_client()
+    try:
+        page = notion_api.call(notion.blocks.retrieve, block_id=page_id)
+    except HTTPResponseError as e:
+        if getattr(e, "status", None) == 404:
+            return False
+        raise
+    return not (page.get("archived") or page.get("in_trash"))
+
+def _full_sync(month: str, content: str, blocks: list, states: dict) -> dict:
+    """새 페이지로 전체를 올린 뒤, 이후 동기화를 위해 페이지의 블록 ID를 읽어 저장합니다."""
+    state = _export_blocks(month, content, blocks)
+    sync_state = {"page_id": state["page_id"], "url": state.get("url")}
+    states[month] = sync_state
+    _reload_sync_state(sync_state, states)
+    if len(sync_state["blocks"]) != len(blocks):
+        raise RuntimeError(f"업로드된 블록 수가 다릅니다 ({len(sync_state['blocks'])} != {len(blocks)}).")
+    return {"url": state.get("url"), "inserted": len(blocks), "updated": 0, "deleted": 0, "unchanged": 0, "created": True}
+
+def _insert_after(page_id: str, after_id: str, batch: list, known_ids: set) -> list:
+    """
+    after_id 블록 뒤에 batch(최대 100개)를 끼워 넣고, 생성된 블록 항목을 batch 순서대로 반환합니다.
+    응답 목록의 순서나 다른 자식 블록 포함 여부는 보장되지 않으므로,
+    이미 아는 블록을 빼고 내용 해시로 짝을 맞춥니다 (같은 내용끼리는 어느 ID를 가져도 결과가 같습니다).
+    """
+    notion = notion_api.get_client()
+    res = notion_api.call(notion.blocks.children.append, block_id=page_id, after=after_id, children=batch)
+    created = {}
+    for r in res.get("results", []):
+        if r["id"] not in known_ids:
+            created.setdefault(_block_hash(r), []).append(r["id"])
+
+    entries = []
+    for block in batch:
+        ids = created.get(_block_hash(block))
+        if not ids:
+            # 응답만으로 알 수 없으면 페이지에서 after_id 바로 뒤 위치로 찾습니다.
+            return _entries_after(page_id, after_id, batch)
+        entries.append(_block_entry(ids.pop(0), block))
+    return entries
+
+def _entries_after(page_id: str, after_id: str, batch: list) -> list:
+    ids = _list_child_ids(page_id)
+    pos = ids.index(after_id) + 1
+    return [_block_entry(i, b) for i, b in zip(ids[pos:pos + len(batch)], batch)]
+
+def _sync_blocks(month: str, content: str, blocks: list) -> dict:
+    """
+    지난 동기화 때 저장한 블록 해시와 새 블록을 SequenceMatcher로 비교해 바뀐 블록만 반영합니다.
+    - 내용만 바뀐 블록은 같은 타입이면 blocks.update, 타입이 바뀌면 삭제 후 삽입
+    - 새 블록은 앞 블록 뒤에 blocks.children.append(after=...)
+    - 사라진 블록은 blocks.delete
+    API 호출마다 현재 페이지 상태를 저장하므로 중간에 실패해도 다음 동기화가 실제 페이지와 맞게 이어집니다.
+    응답을 받지 못한 추가 요청이 있었다면 다음 동기화 전에 페이지를 다시 읽습니다.
+    동기화 상태가 없거나 페이지 맨 앞에 끼워 넣어야 하면(after로 표현 불가) 새 페이지로 전체를 올립니다.
+    """
+    notion = notion_api.get_client()
+    states = _load_state(SYNC_STATE_FILE)
+    state = states.get(month)
+    if not state:
+        return _full_sync(month, content, blocks, states)
+    if state.get("pending_append"):
+        print("[export_to_notion] 이전 동기화의 블록 추가 결과를 알 수 없어 페이지를 다시 읽습니다.")
+        _reload_sync_state(state, states)
+
+    old = state["blocks"]
+    new_hashes = [_block_hash(b) for b in blocks]
+    opcodes = SequenceMatcher(None, [b["hash"] for b in old], new_hashes, autojunk=False).get_opcodes()
+    tag, i1, i2, j1, j2 = opcodes[0] if opcodes else ("equal", 0, 0, 0, 0)
+    if tag in ("insert", "replace") and i1 == 0 and not (i2 > 0 and old[0]["type"] == blocks[0]["type"]):
+        # after로는 첫 블록 앞에 끼워 넣을 수 없으므로, 첫 블록을 update로 바꿀 수 없으면 새로 올립니다.
+        print("[export_to_notion] 페이지 맨 앞에 블록을 추가해야 해서 새 페이지로 올립니다.")
+        return _full_sync(month, content, blocks, states)
+
+    counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    synced = []
+    rest_from = 0
+    known_ids = {b["id"] for b in old}
+
+    def checkpoint():
+        # 지금까지 반영한 앞부분 + 아직 건드리지 않은 old의 뒷부분 = 현재 페이지 상태
+        state["blocks"] = synced + old[rest_from:]
+        state.pop("pending_append", None)
+        _save_state(SYNC_STATE_FILE, states)
+
+    def flush(pending: list) -> None:
+        for batch in notion_api.batches(pending):
+            state["pending_append"] = True
+            _save_state(SYNC_STATE_FILE, states)
+            entries = _insert_after(state["page_id"], synced[-1]["id"], batch, known_ids)
+            known_ids.update(e["id"] for e in entries)
+            synced.extend(entries)
+            counts["inserted"] += len(entries)
+            checkpoint()
+        pending.clear()
+
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            synced.extend(old[i1:i2])
+            rest_from = i2
+            counts["unchanged"] += i2 - i1
+            continue
+
+        pending = []
+        for k in range(max(i2 - i1, j2 - j1)):
+            old_entry = old[i1 + k] if i1 + k < i2 else None
+            block = blocks[j1 + k] if j1 + k < j2 else None
+            if old_entry and block and old_entry["type"] == block["type"]:
+                flush(pending)
+                btype = block["type"]
+                notion_api.call(notion.blocks.update, block_id=old_entry["id"], **{btype: block[btype]})
+                synced.append(_block_entry(old_entry["id"], block))
+                rest_from = i1 + k + 1
+                counts["updated"] += 1
+                checkpoint()
+                continue
+            if old_entry:
+                notion_api.call(notion.blocks.delete, block_id=old_entry["id"])
+                rest_from = i1 + k + 1
+                counts["deleted"] += 1
+                checkpoint()
+            if block:
+                pending.append(block)
+        flush(pending)
+
+    checkpoint()
+    return {"url": state.get("url"), **counts, "created": False}
+
+def _run_sync(month: str, content: str, notion_blocks: list) -> dict:
+    try:
+        result = _sync_blocks(month, content, notion_blocks)
+    except HTTPResponseError as e:
+        if getattr(e, "status", None) != 404:
+            raise
+        states = _load_state(SYNC_STATE_FILE)
+        state = states.get(month)
+        if state and _page_exists(state["page_id"]):
+            # 페이지는 있고 일부 블록만 Notion에서 지워진 경우: 페이지를 다시 읽어 한 번 더 맞춥니다.
+            print(f"[export_to_notion] 저장된 블록이 페이지와 달라 페이지를 다시 읽어 동기화합니다: {e}")
+            _reload_sync_state(state, states)
+            result = _sync_blocks(month, content, notion_blocks)
+        else:
+            # 페이지 자체가 지워졌다면 저장된 상태를 버리고 새로 올립니다.
+            print(f"[export_to_notion] 동기화 대상 페이지가 없어 새 페이지로 올립니다: {e}")
+            states.pop(month, None)
+            result = _full_sync(month, content, notion_blocks, states)
+    print(f"[export_to_notion] Notion 동기화 완료: {result['url']} "
+          f"(추가 {result['inserted']}, 수정 {result['updated']}, 삭제 {result['deleted']}, 유지 {result['unchanged']})")
+    return {"status": "success", "mode": "sync", **result}
+
+def run(month: str = None, content: str = None, mode: str = "full"):
     if not all([month, content]):
         return {"status": "error", "message": "month와 content 인자가 모두 필요합니다."}
 
+    if mode not in ("full", "sync"):
+        return {"status": "error", "message": f"지원하지 않는 mode입니다: {mode} (full 또는 sync)"}
+
     if not NOTION_API_KEY or not NOTION_PAGE_ID:
         return {"status": "error", "message": ".env 파일에 NOTION_API_KEY와 NOTION_PAGE_ID를 설정해야 합니다."}
 
     try:
-        notion = notion_client.Client(auth=NOTION_API_KEY)
-        
-        page_title = f"{month} 월간 피드백 보고서"
         notion_blocks = markdown_to_blocks(content)
-
-        new_page = notion.pages.create(
-            parent={"page_id": NOTION_PAGE_ID},
-            properties={
-                "title": {
-                    "title": [
-                        {
-                            "text": {"content": page_title}
-                        }
-                    ]
-                }
-            },
-            children=notion_blocks
-        )
-        page_url = new_page.get("url")
-        print(f"[export_to_notion] Notion 페이지 생성 완료: {page_url}")
-        return {"status": "success", "url": page_url}
+        if mode == "sync":
+            return _run_sync(month, content, notion_blocks)
+        state = _export_blocks(month, content, notion_blocks)
+        page_url = state.get("url")
+        print(f"[export_to_notion] Notion 페이지 생성 완료: {page_url} ({state['sent']} 블록)")
+        return {"status": "success", "url": page_url, "blocks": state["sent"]}
 
     except Exception as e:
         print(f"[export_to_notion] 오류 발생: {e}")
-        return {"status": "error", "message": f"Notion 페이지 생성 중 오류 발생: {e}"}
+        return {"status": "error", "message": f"Notion 페이지 생성 중 오류 발생: {e} (다시 내보내면 이어서 진행합니다)"}
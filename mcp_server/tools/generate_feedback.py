@@ -1,10 +1,14 @@
-from ..utils.gemini_helper import call_gemini
+from ..utils.gemini_helper import call_gemini, call_gemini_async, stream_gemini
+from ..utils.todo_codec import COMPACT_FORMAT_NOTE
+from ..utils.prompt_budget import fit_prompt_sections
 
-DESCRIPTION = "- generate_feedback(month: str, todos: str, kpi_summary: str, template: str = None): 제공된 정보를 바탕으로 월간 피드백 보고서 초안을 생성합니다. 템플릿이 제공되면 해당 구조를 우선적으로 따릅니다."
+DESCRIPTION = "- generate_feedback(month: str, todos: str | list, kpi_summary: str, template: str = None, token_budget: int = None): 제공된 정보를 바탕으로 월간 피드백 보고서 초안을 생성합니다. 템플릿이 제공되면 해당 구조를 우선적으로 따릅니다. 입력이 token_budget을 넘으면 저영향 업무 묶기, 완료 항목 합치기, 템플릿 축약 순으로 줄이고 결과의 budget에 내역을 남깁니다."
 
-def run(month: str = None, todos: str = None, kpi_summary: str = None, template: str = None):
-    if not all([month, todos, kpi_summary]):
-        return {"status": "error", "message": "month, todos, kpi_summary 인자가 모두 필요합니다."}
+def _build_prompt(month: str, todos, kpi_summary: str, template: str = None, token_budget: int = None):
+    """프롬프트와 토큰 예산 적용 내역(report)을 함께 반환합니다."""
+    # 할 일 목록은 id/공백을 뺀 압축 형식으로 넣고, 예산을 넘으면 우선순위대로 줄입니다.
+    todos, kpi_summary, template, report = fit_prompt_sections(todos, kpi_summary, template, token_budget)
+    print(f"[generate_feedback] 입력 약 {report['final_tokens']} 토큰 (예산 {report['budget']})")
 
     if template and template.strip():
         # Use the user-provided template
@@ -19,7 +23,8 @@ def run(month: str = None, todos: str = None, kpi_summary: str = None, template:
 
 [보고서에 반영할 정보]:
 - 월: {month}
-- 완료한 할 일: {todos}
+- 완료한 할 일 ({COMPACT_FORMAT_NOTE}):
+{todos}
 - KPI 요약: {kpi_summary}
 
 위 정보를 바탕으로 [사용자 지정 템플릿]에 맞춰 보고서를 생성해 주세요.
@@ -31,7 +36,8 @@ def run(month: str = None, todos: str = None, kpi_summary: str = None, template:
 보고서는 반드시 마크다운 형식이어야 하며, 단순히 목록을 나열하는 것이 아니라 자연스러운 문장으로 서술해야 합니다.
 
 **1. 완료한 할 일 목록:**
-```json
+({COMPACT_FORMAT_NOTE})
+```text
 {todos}
 ```
 
@@ -56,8 +62,9 @@ def run(month: str = None, todos: str = None, kpi_summary: str = None, template:
   - (개선점과 진행 중인 업무를 바탕으로 다음 달의 계획을 제안합니다.)
 """
 
-    gemini_result = call_gemini(prompt)
+    return prompt, report
 
+def _to_response(month: str, gemini_result: dict, report: dict) -> dict:
     if gemini_result.get("status") == "ok":
         raw_text = gemini_result.get("result", {}).get("text", "").strip()
         if not raw_text:
@@ -68,5 +75,48 @@ def run(month: str = None, todos: str = None, kpi_summary: str = None, template:
     return {
         "status": "success",
         "month": month,
-        "content": raw_text
-    }
\ No newline at end of file
+        "content": raw_text,
+        "budget": report,
+    }
+
+def run(month: str = None, todos: str = None, kpi_summary: str = None, template: str = None, use_cache: bool = True,
+        token_budget: int = None):
+    if not all([month, todos, kpi_summary]):
+        return {"status": "error", "message": "month, todos, kpi_summary 인자가 모두 필요합니다."}
+
+    prompt, report = _build_prompt(month, todos, kpi_summary, template, token_budget)
+    return _to_response(month, call_gemini(prompt, use_cache=use_cache), report)
+
+async def run_async(month: str = None, todos: str = None, kpi_summary: str = None, template: str = None, use_cache: bool = True,
+        token_budget: int = None):
+    """run()의 asyncio 버전. MCP 서버에서 이벤트 루프를 막지 않고 호출됩니다."""
+    if not all([month, todos, kpi_summary]):
+        return {"status": "error", "message": "month, todos, kpi_summary 인자가 모두 필요합니다."}
+
+    prompt, report = _build_prompt(month, todos, kpi_summary, template, token_budget)
+    return _to_response(month, await call_gemini_async(prompt, use_cache=use_cache), report)
+
+def stream(month: str = None, todos: str = None, kpi_summary: str = None, template: str = None, use_cache: bool = True,
+        token_budget: int = None):
+    """
+    run()의 스트리밍 버전. 모델이 생성하는 텍스트 조각을 도착하는 대로 yield 합니다.
+    Yields:
+        dict: {"status": "delta", "text": 조각} 을 반복한 뒤
+              {"status": "success", "month": ..., "content": 전체 보고서, "budget": 예산 내역} 또는 {"status": "error", "message": ...}
+    """
+    if not all([month, todos, kpi_summary]):
+        yield {"status": "error", "message": "month, todos, kpi_summary 인자가 모두 필요합니다."}
+        return
+
+    prompt, report = _build_prompt(month, todos, kpi_summary, template, token_budget)
+    parts = []
+    try:
+        for text in stream_gemini(prompt, use_cache=use_cache):
+            parts.append(text)
+            yield {"status": "delta", "text": text}
+    except Exception as e:
+        yield {"status": "error", "message": f"[생성 오류] {e}"}
+        return
+
+    raw_text = "".join(parts).strip() or "[생성 실패: 빈 응답]"
+    yield {"status": "success", "month": month, "content": raw_text, "budget": report}
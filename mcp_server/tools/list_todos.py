@@ -1,26 +1,59 @@
-import os
 import json
+import base64
+from ..utils.todo_store import get_store, sort_key
 
-DESCRIPTION = "- list_todos(): storage/todos/todo_list.json 파일에서 모든 Todo 목록을 조회합니다."
+DESCRIPTION = "- list_todos(month: str = None, status: str = None, impact: str = None, date_from: str = None, date_to: str = None, fields: list = None, cursor: str = None, limit: int = 100): 저장된 Todo 목록을 조회합니다. month(YYYY-MM), status('done'|'pending'), impact('high'|'mid'|'low'), 날짜 범위(YYYY-MM-DD)로 필터링하고, fields로 필요한 키만 받을 수 있습니다. 결과에 next_cursor가 있으면 cursor로 넘겨 다음 페이지를 조회합니다."
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-TODO_DIR = os.path.normpath(os.path.join(BASE_DIR, "../../storage/todos"))
-TODO_FILE = os.path.join(TODO_DIR, "todo_list.json")
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
 
-def run():
+def _encode_cursor(task: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(sort_key(task), ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str):
+    return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")))
+
+def _project(task: dict, fields) -> dict:
+    if not fields:
+        return task
+    return {k: task[k] for k in fields if k in task}
+
+def run(month: str = None, status: str = None, impact: str = None, date_from: str = None, date_to: str = None,
+        fields: list = None, cursor: str = None, limit: int = None):
     """
-    storage/todos/todo_list.json 파일에서 모든 todo 목록을 읽어옵니다.
+    할 일 저장소에서 조건에 맞는 todo 목록을 최신순으로 읽어옵니다.
+    Args:
+        month (str): 'YYYY-MM'. 주어지면 해당 월만 조회합니다.
+        status, impact (str | list): 값 하나, 리스트, 또는 쉼표 구분 문자열
+        date_from, date_to (str): 'YYYY-MM-DD' (양 끝 포함)
+        fields (list | str): 결과에 포함할 키 (예: ["date", "task", "status"])
+        cursor (str): 이전 응답의 next_cursor
+        limit (int): 페이지 크기 (기본 100, 1~500 범위로 맞춤)
     """
-    if not os.path.exists(TODO_FILE):
-        return {"status": "error", "message": f"Todo 파일이 존재하지 않습니다: {TODO_FILE}"}
+    try:
+        limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+        after = _decode_cursor(cursor) if cursor else None
+    except (ValueError, TypeError) as e:
+        return {"status": "error", "message": f"잘못된 limit 또는 cursor입니다: {e}"}
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
 
     try:
-        with open(TODO_FILE, "r", encoding="utf-8") as f:
-            todos = json.load(f)
+        # 다음 페이지 존재 여부를 알기 위해 한 건 더 읽습니다.
+        rows = get_store().query(
+            month=month, status=status, impact=impact,
+            date_from=date_from, date_to=date_to,
+            after=after, limit=limit + 1,
+        )
     except Exception as e:
-        return {"status": "error", "message": f"파일 로드 실패: {e}"}
+        return {"status": "error", "message": f"할 일 조회 실패: {e}"}
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
     return {
         "status": "success",
-        "todos": todos,
+        "todos": [_project(t, fields) for t in rows],
+        "count": len(rows),
+        "next_cursor": _encode_cursor(rows[-1]) if has_more else None,
     }
@@ -1,32 +1,48 @@
 import os
-import pdfplumber
+from ..utils import pdf_cache, pdf_extract
 
-DESCRIPTION = "- parse_pdf(filename: str = None): PDF 파일의 텍스트를 추출합니다. filename에 '@designated'를 전달하면 지정된 대표 KPI 파일을 읽습니다."
+DESCRIPTION = "- parse_pdf(filename: str = None, workers: int = None): PDF 파일의 텍스트를 추출합니다. filename에 '@designated'를 전달하면 지정된 대표 KPI 파일을 읽습니다. workers로 병렬 추출 프로세스 수를 지정할 수 있습니다."
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PDF_STORAGE_ROOT = os.path.normpath(os.path.join(BASE_DIR, "../../storage/pdf"))
 GUIDE_DIR = os.path.normpath(os.path.join(BASE_DIR, "../../storage/guide"))
 
-def run(filename: str = None):
+def _load_or_extract_pages(pdf_path: str, filename: str, workers: int = None) -> list:
+    digest = pdf_cache.file_digest(pdf_path)
+    pages = pdf_cache.load_pages(digest, pdf_extract.EXTRACTOR_VERSION)
+    if pages is not None:
+        print(f"[parse_pdf] 캐시 적중: {filename}")
+        return pages
+
+    pages = pdf_extract.extract_pages(pdf_path, workers=workers)
+    pdf_cache.save_pages(digest, pdf_extract.EXTRACTOR_VERSION, pages)
+    return pages
+
+def _resolve_pdf_path(filename: str = None):
+    """
+    filename 인자를 실제 PDF 경로로 변환합니다.
+    Returns:
+        tuple: (pdf_path, filename, error). 실패 시 error에 오류 응답 dict가 담깁니다.
+    """
     pdf_path = None
 
     if filename == '@designated':
         pdf_path = os.path.join(GUIDE_DIR, "selected_KPI.pdf")
         if not os.path.exists(pdf_path):
-            return {"status": "error", "message": "대표 KPI 파일('selected_KPI.pdf')이 지정되지 않았습니다. 'KPI 관리' 탭에서 먼저 지정해주세요."}
+            return None, filename, {"status": "error", "message": "대표 KPI 파일('selected_KPI.pdf')이 지정되지 않았습니다. 'KPI 관리' 탭에서 먼저 지정해주세요."}
         # For logging, use the designated name
         filename = "selected_KPI.pdf"
     elif filename:
         # Security check to prevent path traversal
         if '/' in filename or '\\' in filename:
-            return {"status": "error", "message": "filename에는 순수한 파일명만 입력해야 합니다."}
+            return None, filename, {"status": "error", "message": "filename에는 순수한 파일명만 입력해야 합니다."}
         pdf_path = os.path.join(PDF_STORAGE_ROOT, filename)
         if not os.path.exists(pdf_path):
-            return {"status": "error", "message": f"PDF 파일을 찾을 수 없습니다: {pdf_path}"}
+            return None, filename, {"status": "error", "message": f"PDF 파일을 찾을 수 없습니다: {pdf_path}"}
     else:
         # If no filename is given, scan the default PDF storage
         if not os.path.exists(PDF_STORAGE_ROOT):
-            return {"status": "error", "message": f"PDF 루트 폴더를 찾을 수 없습니다: {PDF_STORAGE_ROOT}"}
+            return None, filename, {"status": "error", "message": f"PDF 루트 폴더를 찾을 수 없습니다: {PDF_STORAGE_ROOT}"}
         
         pdf_files = [f for f in os.listdir(PDF_STORAGE_ROOT) if f.endswith(".pdf")]
         
@@ -35,21 +51,22 @@ def run(filename: str = None):
             pdf_path = os.path.join(PDF_STORAGE_ROOT, filename)
             print(f"[parse_pdf] 폴더에서 유일한 PDF 파일 '{filename}'을 대상으로 지정합니다.")
         elif len(pdf_files) == 0:
-            return {"status": "error", "message": "처리할 PDF 파일이 storage/pdf 폴더에 없습니다."}
+            return None, filename, {"status": "error", "message": "처리할 PDF 파일이 storage/pdf 폴더에 없습니다."}
         else:
-            return {"status": "error", "message": f"여러 개의 PDF 파일이 있습니다. 어떤 파일을 처리할지 filename으로 지정해주세요. (파일 목록: {pdf_files})"}
+            return None, filename, {"status": "error", "message": f"여러 개의 PDF 파일이 있습니다. 어떤 파일을 처리할지 filename으로 지정해주세요. (파일 목록: {pdf_files})"}
+
+    return pdf_path, filename, None
+
+def run(filename: str = None, workers: int = None):
+    pdf_path, filename, error = _resolve_pdf_path(filename)
+    if error:
+        return error
 
     print(f"[parse_pdf] PDF 파일 처리 시작: {filename}")
 
     try:
-        extracted = []
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    extracted.append(text.strip())
-        
-        full_text = "\n".join(extracted)
+        pages = _load_or_extract_pages(pdf_path, filename, workers=workers)
+        full_text = "\n".join(p for p in pages if p)
 
         if not full_text:
             return {"status": "success", "text": "[추출 실패: 파일에 텍스트가 없음]"}
@@ -63,3 +80,39 @@ def run(filename: str = None):
         "status": "success",
         "text": full_text
     }
+
+def stream(filename: str = None):
+    """
+    run()의 스트리밍 버전. 페이지를 추출하는 대로 하나씩 yield 합니다.
+    Yields:
+        dict: {"status": "page", "page": 1부터 시작하는 번호, "total": 전체 페이지 수, "text": ...}
+              마지막으로 {"status": "success", "pages": 전체 페이지 수} 또는 {"status": "error", "message": ...}
+    """
+    pdf_path, filename, error = _resolve_pdf_path(filename)
+    if error:
+        yield error
+        return
+
+    print(f"[parse_pdf] PDF 스트리밍 시작: {filename}")
+
+    try:
+        digest = pdf_cache.file_digest(pdf_path)
+        pages = pdf_cache.load_pages(digest, pdf_extract.EXTRACTOR_VERSION)
+        if pages is not None:
+            print(f"[parse_pdf] 캐시 적중: {filename}")
+            total = len(pages)
+            for i, text in enumerate(pages, start=1):
+                yield {"status": "page", "page": i, "total": total, "text": text}
+        else:
+            total = pdf_extract.count_pages(pdf_path)
+            pages = []
+            for i, text in enumerate(pdf_extract.iter_pages(pdf_path), start=1):
+                pages.append(text)
+                yield {"status": "page", "page": i, "total": total, "text": text}
+            pdf_cache.save_pages(digest, pdf_extract.EXTRACTOR_VERSION, pages)
+    except Exception as e:
+        yield {"status": "error", "message": f"PDF 처리 중 오류 발생: {e}"}
+        return
+
+    print(f"[parse_pdf] 스트리밍 완료: {filename}")
+    yield {"status": "success", "pages": len(pages)}
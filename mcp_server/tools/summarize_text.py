@@ -1,27 +1,145 @@
-from ..utils.gemini_helper import call_gemini
+import os
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from ..utils.gemini_helper import call_gemini, call_gemini_async
+from ..utils.token_utils import estimate_tokens, split_into_chunks
 
-DESCRIPTION = "- summarize_text(text_to_summarize: str): 주어진 텍스트를 요약합니다."
+DESCRIPTION = "- summarize_text(text_to_summarize: str, mode: str = 'auto'): 주어진 텍스트를 요약합니다. 긴 텍스트는 청크로 나눠 병렬 요약한 뒤 합칩니다(mode: 'auto' | 'single' | 'map_reduce')."
 
-def run(text_to_summarize: str = None):
-    if not text_to_summarize:
-        return {"status": "error", "message": "요약할 텍스트가 필요합니다."}
+# 청크 하나에 담을 최대 토큰 수. auto 모드에서는 이를 넘는 텍스트만 분할 요약합니다.
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))
+# 청크 요약을 동시에 몇 개까지 요청할지
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "4"))
 
-    prompt = f"""다음 텍스트를 한국어로 요약해 주세요:
+def _summary_prompt(text: str) -> str:
+    return f"""다음 텍스트를 한국어로 요약해 주세요:
 
     --- 텍스트 ---
-    {text_to_summarize}
+    {text}
     --- 텍스트 끝 ---
 
     요약:"
     """
 
-    gemini_result = call_gemini(prompt)
+def _chunk_prompt(text: str, index: int, total: int) -> str:
+    return f"""다음은 긴 문서를 {total}개로 나눈 것 중 {index}번째 부분입니다.
+이 부분의 핵심 내용(수치, 목표, 지표 포함)을 한국어로 빠짐없이 요약해 주세요.
 
-    if gemini_result.get("status") == "ok":
-        summary_text = gemini_result.get("result", {}).get("text", "").strip()
-        if not summary_text:
-            return {"status": "success", "summary": "[요약 실패: 빈 응답]"}
-        else:
-            return {"status": "success", "summary": summary_text}
+--- 텍스트 ---
+{text}
+--- 텍스트 끝 ---
+
+요약:
+"""
+
+def _reduce_prompt(partials: list) -> str:
+    joined = "\n\n".join(f"[부분 {i}]\n{p}" for i, p in enumerate(partials, start=1))
+    return f"""다음은 하나의 긴 문서를 여러 부분으로 나눠 각각 요약한 결과입니다.
+중복을 제거하고 전체 흐름이 이어지도록 하나의 요약으로 통합해 한국어로 작성해 주세요.
+
+--- 부분 요약 ---
+{joined}
+--- 부분 요약 끝 ---
+
+통합 요약:
+"""
+
+def _call(prompt: str, use_cache: bool = True):
+    gemini_result = call_gemini(prompt, use_cache=use_cache)
+    if gemini_result.get("status") != "ok":
+        raise RuntimeError(gemini_result.get("message", ""))
+    return gemini_result.get("result", {}).get("text", "").strip()
+
+async def _call_async(prompt: str, use_cache: bool = True):
+    gemini_result = await call_gemini_async(prompt, use_cache=use_cache)
+    if gemini_result.get("status") != "ok":
+        raise RuntimeError(gemini_result.get("message", ""))
+    return gemini_result.get("result", {}).get("text", "").strip()
+
+# 부분 요약을 다시 접는 최대 단계 수
+_MAX_REDUCE_DEPTH = 3
+
+def _map_reduce(text: str, chunk_tokens: int, max_workers: int, use_cache: bool = True, depth: int = 0) -> str:
+    call = partial(_call, use_cache=use_cache)
+    chunks = split_into_chunks(text, chunk_tokens)
+    print(f"[summarize_text] {len(chunks)}개 청크로 나눠 요약합니다.")
+    if len(chunks) == 1:
+        return call(_summary_prompt(chunks[0]))
+
+    # map: 청크별 요약을 동시에 요청 (결과는 청크 순서 유지)
+    prompts = [_chunk_prompt(c, i, len(chunks)) for i, c in enumerate(chunks, start=1)]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts)))) as pool:
+        partials = [p for p in pool.map(call, prompts) if p]
+
+    # reduce: 부분 요약이 여전히 예산을 넘으면 한 단계 더 접습니다.
+    reduce_prompt = _reduce_prompt(partials)
+    if estimate_tokens(reduce_prompt) > chunk_tokens and len(partials) > 1 and depth < _MAX_REDUCE_DEPTH:
+        return _map_reduce("\n\n".join(partials), chunk_tokens, max_workers, use_cache, depth + 1)
+    return call(reduce_prompt)
+
+async def _map_reduce_async(text: str, chunk_tokens: int, use_cache: bool = True, depth: int = 0) -> str:
+    # 동시 요청 수는 gemini_helper의 전역 세마포어(LLM_MAX_CONCURRENCY)가 제한합니다.
+    chunks = split_into_chunks(text, chunk_tokens)
+    print(f"[summarize_text] {len(chunks)}개 청크로 나눠 요약합니다.")
+    if len(chunks) == 1:
+        return await _call_async(_summary_prompt(chunks[0]), use_cache)
+
+    prompts = [_chunk_prompt(c, i, len(chunks)) for i, c in enumerate(chunks, start=1)]
+    results = await asyncio.gather(*(_call_async(p, use_cache) for p in prompts))
+    partials = [p for p in results if p]
+
+    reduce_prompt = _reduce_prompt(partials)
+    if estimate_tokens(reduce_prompt) > chunk_tokens and len(partials) > 1 and depth < _MAX_REDUCE_DEPTH:
+        return await _map_reduce_async("\n\n".join(partials), chunk_tokens, use_cache, depth + 1)
+    return await _call_async(reduce_prompt, use_cache)
+
+def _resolve_mode(text_to_summarize: str, mode: str, chunk_tokens: int):
+    """(mode, chunk_tokens, error) 를 반환합니다. auto 모드는 텍스트 길이에 따라 결정됩니다."""
+    if not text_to_summarize:
+        return None, None, {"status": "error", "message": "요약할 텍스트가 필요합니다."}
+    if mode not in ("auto", "single", "map_reduce"):
+        return None, None, {"status": "error", "message": f"지원하지 않는 mode입니다: {mode}"}
+
+    chunk_tokens = int(chunk_tokens or SUMMARY_CHUNK_TOKENS)
+    if mode == "auto":
+        mode = "map_reduce" if estimate_tokens(text_to_summarize) > chunk_tokens else "single"
+    return mode, chunk_tokens, None
+
+def _to_response(summary_text: str) -> dict:
+    if not summary_text:
+        return {"status": "success", "summary": "[요약 실패: 빈 응답]"}
     else:
-        return {"status": "error", "message": f"[요약 오류] {gemini_result.get('message', '')}"}
\ No newline at end of file
+        return {"status": "success", "summary": summary_text}
+
+def run(text_to_summarize: str = None, mode: str = "auto", chunk_tokens: int = None, max_workers: int = None, use_cache: bool = True):
+    mode, chunk_tokens, error = _resolve_mode(text_to_summarize, mode, chunk_tokens)
+    if error:
+        return error
+
+    max_workers = int(max_workers or SUMMARY_MAX_WORKERS)
+    try:
+        if mode == "map_reduce":
+            summary_text = _map_reduce(text_to_summarize, chunk_tokens, max_workers, use_cache)
+        else:
+            summary_text = _call(_summary_prompt(text_to_summarize), use_cache)
+    except RuntimeError as e:
+        return {"status": "error", "message": f"[요약 오류] {e}"}
+
+    return _to_response(summary_text)
+
+async def run_async(text_to_summarize: str = None, mode: str = "auto", chunk_tokens: int = None, max_workers: int = None, use_cache: bool = True):
+    """run()의 asyncio 버전. 청크 요약을 이벤트 루프에서 동시에 진행합니다."""
+    mode, chunk_tokens, error = _resolve_mode(text_to_summarize, mode, chunk_tokens)
+    if error:
+        return error
+
+    try:
+        if mode == "map_reduce":
+            summary_text = await _map_reduce_async(text_to_summarize, chunk_tokens, use_cache)
+        else:
+            summary_text = await _call_async(_summary_prompt(text_to_summarize), use_cache)
+    except RuntimeError as e:
+        return {"status": "error", "message": f"[요약 오류] {e}"}
+
+    return _to_response(summary_text)
@@ -1,24 +1,174 @@
 import re
 import json
 import os
+import random
+import asyncio
+import weakref
+import threading
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
+from . import llm_cache
 
 # .env 파일로부터 환경 변수 로드
 load_dotenv()
 
-# API 키 설정
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise ValueError("GOOGLE_API_KEY is not set in the environment.")
-genai.configure(api_key=API_KEY)
+# 모델 설정
+MODEL_NAME = "gemini-2.0-flash"
+GENERATION_CONFIG = {}
+
+# 모델은 첫 호출 때 만듭니다. (import만으로는 API 키를 요구하지 않음)
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """API 키를 설정하고 모델을 초기화해 반환합니다. 키가 없으면 ValueError를 발생시킵니다."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise ValueError("GEMINI_API_KEY is not set in the environment.")
+                genai.configure(api_key=api_key)
+                _model = genai.GenerativeModel(MODEL_NAME, generation_config=GENERATION_CONFIG or None)
+    return _model
+
+# 비동기 호출 설정
+# - 동시에 진행할 수 있는 최대 요청 수 (프로세스 전역)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+# - 요청 1회당 제한 시간(초)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+# - 속도 제한(429) 등 일시적 오류 시 재시도 횟수와 지수 백오프 기본 간격(초)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+
+_RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+)
+
+# 이벤트 루프별 세마포어 (Streamlit 등에서 asyncio.run이 여러 번 호출될 수 있음)
+_semaphores = weakref.WeakKeyDictionary()
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _semaphores[loop] = sem
+    return sem
+
+# 동기 코드(Streamlit 세션 스레드 등)에서 쓰는 프로세스 전역 이벤트 루프.
+# 모든 세션의 LLM 호출이 같은 루프, 같은 세마포어를 거치므로 LLM_MAX_CONCURRENCY가 프로세스 전체에 적용됩니다.
+_background_loop = None
+_background_lock = threading.Lock()
+
+def run_coroutine(coro):
+    """코루틴을 전역 백그라운드 이벤트 루프에서 실행하고 결과를 기다립니다."""
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="llm-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop).result()
+
+def _is_retryable(e: Exception) -> bool:
+    return isinstance(e, _RETRYABLE_ERRORS) or "429" in str(e)
+
+def call_gemini(prompt: str, use_cache: bool = True):
+    """
+    Args:
+        prompt (str): 모델에 보낼 프롬프트
+        use_cache (bool): False이면 캐시를 건너뛰고 항상 모델을 호출합니다.
+    """
+    use_cache = use_cache and llm_cache.LLM_CACHE_ENABLED
+    cache_key = llm_cache.make_key(MODEL_NAME, GENERATION_CONFIG, prompt) if use_cache else None
+    if cache_key:
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return {"status": "ok", "result": {"text": cached}, "cached": True}
+
+    try:
+        response = get_model().generate_content(prompt)
+        raw = (response.text or "").strip()
+        if cache_key and raw:
+            llm_cache.put(cache_key, MODEL_NAME, raw)
+        return {"status": "ok", "result": {"text": raw}}
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "result": {"text": ""}
+        }
+
+def stream_gemini(prompt: str, use_cache: bool = True):
+    """
+    Gemini 스트리밍 API로 응답 텍스트 조각을 도착하는 대로 yield 합니다.
+    캐시 적중 시에는 저장된 전체 응답을 한 번에 yield 합니다. 호출 오류는 예외로 전달됩니다.
+    """
+    use_cache = use_cache and llm_cache.LLM_CACHE_ENABLED
+    cache_key = llm_cache.make_key(MODEL_NAME, GENERATION_CONFIG, prompt) if use_cache else None
+    if cache_key:
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    for chunk in get_model().generate_content(prompt, stream=True):
+        try:
+            text = chunk.text or ""
+        except ValueError:
+            # 종료 사유/안전 필터 정보만 담긴 조각은 text 파트가 없어 .text가 ValueError를 냅니다.
+            text = ""
+        if text:
+            parts.append(text)
+            yield text
+
+    raw = "".join(parts).strip()
+    if cache_key and raw:
+        llm_cache.put(cache_key, MODEL_NAME, raw)
+
+async def generate_async(model, contents, timeout: float = None):
+    """
+    model.generate_content_async를 전역 세마포어, 속도 제한 재시도, 제한 시간과 함께 호출해 응답 객체를 반환합니다.
+    실패하면 예외를 그대로 전달합니다 (시간 초과는 TimeoutError).
+    """
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            async with _get_semaphore():
+                return await asyncio.wait_for(model.generate_content_async(contents), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Gemini 응답 시간 초과 ({timeout}s)")
+        except Exception as e:
+            if attempt < LLM_MAX_RETRIES and _is_retryable(e):
+                # 세마포어를 반납한 상태에서 대기해 다른 요청이 막히지 않도록 합니다.
+                delay = LLM_BACKOFF_BASE * (2 ** attempt) + random.uniform(0, LLM_BACKOFF_BASE)
+                print(f"[gemini_helper] 일시적 오류, {delay:.1f}초 후 재시도 ({attempt + 1}/{LLM_MAX_RETRIES}): {e}")
+                await asyncio.sleep(delay)
+                continue
+            raise
+
+async def call_gemini_async(prompt: str, use_cache: bool = True, timeout: float = None):
+    """
+    call_gemini의 asyncio 버전. 응답 형식은 동일합니다.
+    전역 세마포어로 동시 요청 수를 제한하고, 속도 제한 오류에는 지수 백오프로 재시도합니다.
+    """
+    use_cache = use_cache and llm_cache.LLM_CACHE_ENABLED
+    cache_key = llm_cache.make_key(MODEL_NAME, GENERATION_CONFIG, prompt) if use_cache else None
+    if cache_key:
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            return {"status": "ok", "result": {"text": cached}, "cached": True}
 
-# 모델 초기화
-model = genai.GenerativeModel("gemini-2.0-flash")
-def call_gemini(prompt: str):
     try:
-        response = model.generate_content(prompt)
+        response = await generate_async(get_model(), prompt, timeout)
         raw = (response.text or "").strip()
+        if cache_key and raw:
+            await asyncio.to_thread(llm_cache.put, cache_key, MODEL_NAME, raw)
         return {"status": "ok", "result": {"text": raw}}
     except Exception as e:
         return {
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+# Gemini 응답을 (모델, 생성 설정, 프롬프트) 해시 기준으로 저장하는 SQLite 캐시
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DB = os.path.normpath(os.path.join(BASE_DIR, "../../storage/cache/llm_cache.sqlite3"))
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") not in ("0", "false", "False")
+# 항목 유효 시간(초). 기본 7일
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+# 최대 항목 수. 넘으면 가장 오래 사용되지 않은 항목부터 삭제
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+
+@contextmanager
+def _connect():
+    """트랜잭션(성공 시 커밋, 오류 시 롤백)으로 감싼 연결. 블록이 끝나면 연결을 닫습니다."""
+    os.makedirs(os.path.dirname(CACHE_DB), exist_ok=True)
+    conn = sqlite3.connect(CACHE_DB, timeout=10)
+    try:
+        with conn:
+            _ensure_schema(conn)
+            yield conn
+    finally:
+        conn.close()
+
+
+def _ensure_schema(conn) -> None:
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+
+
+def make_key(model_name: str, generation_config: dict, prompt) -> str:
+    payload = json.dumps(
+        {"model": model_name, "config": generation_config or {}, "prompt": prompt},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key: str):
+    """캐시된 응답 텍스트를 반환합니다. 없거나 만료되었으면 None."""
+    now = time.time()
+    with _lock:
+        try:
+            with _connect() as conn:
+                row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] <= LLM_CACHE_TTL:
+                    conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                    _stats["hits"] += 1
+                    return row[0]
+                if row:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            print(f"[llm_cache] 조회 실패: {e}")
+        _stats["misses"] += 1
+        return None
+
+
+def put(key: str, model_name: str, response: str) -> None:
+    now = time.time()
+    with _lock:
+        try:
+            with _connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, model_name, response, now, now),
+                )
+                _stats["writes"] += 1
+                _evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"[llm_cache] 저장 실패: {e}")
+
+
+def _evict(conn, now: float) -> None:
+    # 1) 만료 항목 제거
+    removed = conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - LLM_CACHE_TTL,)).rowcount
+    # 2) 개수 제한 초과분을 LRU 순으로 제거
+    removed += conn.execute(
+        """DELETE FROM llm_cache WHERE key IN (
+            SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+        )""",
+        (LLM_CACHE_MAX_ENTRIES,),
+    ).rowcount
+    _stats["evictions"] += max(0, removed)
+
+
+def stats() -> dict:
+    """현재 프로세스의 적중/실패 카운터와 저장된 항목 수를 반환합니다."""
+    with _lock:
+        result = dict(_stats)
+        try:
+            with _connect() as conn:
+                result["entries"] = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        except sqlite3.Error:
+            result["entries"] = None
+    return result
+
+
+def clear() -> None:
+    with _lock:
+        with _connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
@@ -0,0 +1,123 @@
+import os
+import time
+import random
+import threading
+import httpx
+from dotenv import load_dotenv
+import notion_client
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+load_dotenv()
+
+NOTION_API_KEY = os.getenv("NOTION_API_KEY")
+# 로컬 스텁 서버 등으로 바꿔 테스트할 때 사용 (예: http://127.0.0.1:9000)
+NOTION_BASE_URL = os.getenv("NOTION_BASE_URL")
+
+# Notion API 제약
+# - 요청 하나에 담을 수 있는 최대 children 블록 수
+NOTION_BATCH_SIZE = 100
+# - 평균 허용 요청 수(초당)와 순간 허용량
+NOTION_RATE_PER_SEC = float(os.getenv("NOTION_RATE_PER_SEC", "3"))
+NOTION_BURST = int(os.getenv("NOTION_BURST", "3"))
+# - 429/5xx/시간 초과 시 재시도 횟수와 지수 백오프 기본 간격(초)
+NOTION_MAX_RETRIES = int(os.getenv("NOTION_MAX_RETRIES", "5"))
+NOTION_BACKOFF_BASE = float(os.getenv("NOTION_BACKOFF_BASE", "1.0"))
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+# 다시 보내면 페이지/블록이 중복 생성되는 쓰기 메서드 (pages.create, blocks.children.append 등)
+_UNSAFE_METHODS = {"create", "append"}
+
+
+class TokenBucket:
+    """초당 rate개씩 토큰이 차는 버킷. acquire()는 토큰이 생길 때까지 기다립니다."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """429 응답 후 모든 호출자가 seconds 동안 쉬도록 토큰을 음수로 만듭니다."""
+        with self._lock:
+            self._tokens = min(self._tokens, 0) - seconds * self.rate
+            self._updated = time.monotonic()
+
+
+_bucket = TokenBucket(NOTION_RATE_PER_SEC, NOTION_BURST)
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> notion_client.Client:
+    """프로세스 전역 Notion 클라이언트 (연결 재사용)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                options = {"auth": NOTION_API_KEY}
+                if NOTION_BASE_URL:
+                    options["base_url"] = NOTION_BASE_URL
+                if hasattr(notion_client.client, "RetryOptions"):
+                    # notion-client 3.x 자체 재시도는 끄고, 버킷을 공유하는 call()에서 재시도합니다.
+                    options["retry"] = False
+                _client = notion_client.Client(**options)
+    return _client
+
+def _retry_after(e: Exception, attempt: int) -> float:
+    headers = getattr(e, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return NOTION_BACKOFF_BASE * (2 ** attempt) + random.uniform(0, NOTION_BACKOFF_BASE)
+
+def _is_idempotent(method) -> bool:
+    return getattr(method, "__name__", "") not in _UNSAFE_METHODS
+
+def call(method, **kwargs):
+    """
+    Notion API 호출을 토큰 버킷으로 제한하고 실패 시 지수 백오프로 재시도합니다.
+    - 429는 Notion이 처리하지 않은 요청이므로 항상 Retry-After를 지켜 재시도합니다.
+    - 연결 자체가 안 된 경우(요청이 Notion에 닿지 않음)도 항상 재시도합니다.
+    - 5xx/시간 초과는 조회·수정·삭제처럼 반복해도 결과가 같은 호출만 재시도합니다.
+      pages.create / blocks.children.append는 실제로는 반영됐을 수 있어 중복 생성을 막기 위해 그대로 실패시킵니다.
+    Args:
+        method: get_client().pages.create 같은 엔드포인트 메서드
+    """
+    idempotent = _is_idempotent(method)
+    for attempt in range(NOTION_MAX_RETRIES + 1):
+        _bucket.acquire()
+        try:
+            return method(**kwargs)
+        except (HTTPResponseError, RequestTimeoutError, httpx.ConnectError) as e:
+            status = getattr(e, "status", None)
+            if status == 429 or isinstance(e, httpx.ConnectError):
+                retryable = True
+            else:
+                retryable = idempotent and (isinstance(e, RequestTimeoutError) or status in _RETRY_STATUS)
+            if not retryable or attempt >= NOTION_MAX_RETRIES:
+                raise
+            delay = _retry_after(e, attempt)
+            reason = status or ("connect" if isinstance(e, httpx.ConnectError) else "timeout")
+            print(f"[notion_api] {reason} 응답, {delay:.1f}초 후 재시도 ({attempt + 1}/{NOTION_MAX_RETRIES})")
+            if status == 429:
+                # 버킷을 비워 다음 acquire()에서 (다른 스레드 호출까지) 함께 기다리게 합니다.
+                _bucket.pause(delay)
+            else:
+                time.sleep(delay)
+
+def batches(blocks: list, size: int = NOTION_BATCH_SIZE):
+    for i in range(0, len(blocks), size):
+        yield blocks[i:i + size]
@@ -0,0 +1,83 @@
+import os
+import json
+import hashlib
+import threading
+
+# PDF 텍스트 추출 결과를 파일 내용 해시 기준으로 저장하는 디스크 캐시
+# GUI, MCP 서버, '@designated' 경로 모두 같은 캐시 디렉터리를 공유합니다.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.normpath(os.path.join(BASE_DIR, "../../storage/cache/pdf_text"))
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# (경로, 크기, mtime) → 해시. 같은 프로세스에서 같은 파일을 반복 해싱하지 않기 위한 메모
+_digest_memo = {}
+_lock = threading.Lock()
+
+
+def file_digest(pdf_path: str) -> str:
+    """파일 내용의 sha256 해시를 반환합니다."""
+    st = os.stat(pdf_path)
+    memo_key = (os.path.abspath(pdf_path), st.st_size, st.st_mtime_ns)
+    with _lock:
+        cached = _digest_memo.get(memo_key)
+    if cached:
+        return cached
+
+    h = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+
+    with _lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+def _entry_path(digest: str) -> str:
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+
+def load_pages(digest: str, extractor_version: str):
+    """
+    캐시된 페이지별 텍스트 리스트를 반환합니다.
+    항목이 없거나, 추출기 버전이 다르거나, 손상된 경우 None을 반환합니다(=재생성 필요).
+    """
+    path = _entry_path(digest)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+
+    if entry.get("digest") != digest or entry.get("extractor_version") != extractor_version:
+        return None
+    pages = entry.get("pages")
+    if not isinstance(pages, list) or not all(isinstance(p, str) for p in pages):
+        return None
+    return pages
+
+
+def save_pages(digest: str, extractor_version: str, pages: list) -> None:
+    """페이지별 텍스트를 캐시에 원자적으로 기록합니다. 실패해도 추출 결과에는 영향을 주지 않습니다."""
+    entry = {
+        "digest": digest,
+        "extractor_version": extractor_version,
+        "pages": pages,
+    }
+    path = _entry_path(digest)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[pdf_cache] 캐시 저장 실패: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
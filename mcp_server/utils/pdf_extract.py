@@ -0,0 +1,80 @@
+import os
+import math
+from concurrent.futures import ProcessPoolExecutor
+import pdfplumber
+
+# 페이지 텍스트 추출 로직.
+# 프로세스 풀 워커가 이 모듈만 import 하도록 tools 패키지와 분리해 둡니다.
+
+# 추출 로직이 바뀌면 올려서 기존 캐시 항목을 무효화합니다.
+EXTRACTOR_VERSION = f"1/pdfplumber-{getattr(pdfplumber, '__version__', 'unknown')}"
+
+# 병렬 추출 워커 수 (기본: CPU 코어 수). 1 이하이면 항상 직렬로 처리합니다.
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", "0")) or (os.cpu_count() or 1)
+# 이보다 페이지가 적으면 풀 기동 비용이 더 크므로 직렬로 처리합니다.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+# 워커당 몇 개의 구간으로 나눌지 (부하 분산용)
+_RANGES_PER_WORKER = 2
+
+
+def count_pages(pdf_path: str) -> int:
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_range(pdf_path: str, start: int, end: int) -> list:
+    """[start, end) 페이지의 텍스트를 순서대로 반환합니다. 텍스트가 없는 페이지는 빈 문자열입니다."""
+    texts = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[start:end]:
+            text = page.extract_text()
+            texts.append(text.strip() if text else "")
+            # 레이아웃 객체는 페이지 단위로 해제
+            page.flush_cache()
+    return texts
+
+
+def iter_pages(pdf_path: str):
+    """
+    페이지 텍스트를 한 페이지씩 yield 합니다.
+    각 페이지의 레이아웃 객체는 다음 페이지로 넘어가기 전에 해제되므로
+    메모리는 문서 전체가 아닌 현재 페이지 크기에 비례합니다.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text()
+            page.flush_cache()
+            yield text.strip() if text else ""
+
+
+def _split_ranges(page_count: int, parts: int) -> list:
+    size = max(1, math.ceil(page_count / parts))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def extract_pages(pdf_path: str, workers: int = None) -> list:
+    """
+    PDF 전체 페이지의 텍스트를 페이지 순서대로 반환합니다.
+    페이지 수가 충분히 많으면 구간을 나눠 프로세스 풀에서 병렬로 추출합니다.
+    """
+    workers = PDF_PARSE_WORKERS if workers is None else int(workers)
+    page_count = count_pages(pdf_path)
+
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        return extract_range(pdf_path, 0, page_count)
+
+    workers = min(workers, page_count)
+    ranges = _split_ranges(page_count, workers * _RANGES_PER_WORKER)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(extract_range, pdf_path, start, end) for start, end in ranges]
+            pages = []
+            for future in futures:  # 제출 순서 = 페이지 순서
+                pages.extend(future.result())
+        print(f"[pdf_extract] {page_count}페이지를 {workers}개 프로세스로 병렬 추출했습니다.")
+        return pages
+    except (OSError, RuntimeError) as e:
+        # 프로세스 생성이 막힌 환경 등에서는 직렬 추출로 대체
+        print(f"[pdf_extract] 병렬 추출 실패, 직렬로 재시도합니다: {e}")
+        return extract_range(pdf_path, 0, page_count)
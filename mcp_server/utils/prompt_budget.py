@@ -0,0 +1,162 @@
+import os
+from .token_utils import estimate_tokens
+from .todo_codec import parse_todos, task_row, encode_rows
+
+# generate_feedback 프롬프트에서 할 일/KPI 요약/템플릿 세 구역에 허용하는 토큰 수 합계
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "24000"))
+# 마지막 단계에서 잘라낼 때 할 일 목록에 최소한 보장하는 몫 (템플릿을 뺀 남은 예산 대비 비율)
+PROMPT_TODO_MIN_SHARE = float(os.getenv("PROMPT_TODO_MIN_SHARE", "0.5"))
+
+# 묶음 행에 나열할 업무명 최대 길이
+_GROUP_PREVIEW_CHARS = 80
+_TRUNCATED_MARK = "\n…(이하 생략)"
+
+
+def _preview(names: list) -> str:
+    text = ", ".join(names)
+    return text if len(text) <= _GROUP_PREVIEW_CHARS else text[:_GROUP_PREVIEW_CHARS] + "…"
+
+
+def _group_low_impact(rows: list):
+    """impact=low 행을 상태별 한 줄로 묶습니다."""
+    low = [r for r in rows if r[2] == "low"]
+    if len(low) < 2:
+        return rows, None
+    kept = [r for r in rows if r[2] != "low"]
+    by_status = {}
+    for r in low:
+        by_status.setdefault(r[1], []).append(r[3])
+    for status, names in by_status.items():
+        kept.append(("", status, "low", f"저영향 업무 {len(names)}건: {_preview(names)}"))
+    return kept, f"저영향 업무 {len(low)}건을 {len(by_status)}줄로 묶음"
+
+
+def _compress_done_by_day(rows: list):
+    """high가 아닌 완료 항목을 날짜별 한 줄로 합칩니다."""
+    targets = [r for r in rows if r[1] == "done" and r[2] != "high" and r[0]]
+    by_day = {}
+    for r in targets:
+        by_day.setdefault(r[0], []).append(r[3])
+    if len(targets) == len(by_day):
+        return rows, None
+    merged, seen = [], set()
+    for r in rows:
+        if r in targets:
+            if r[0] not in seen:
+                seen.add(r[0])
+                merged.append((r[0], "done", "mixed", "; ".join(by_day[r[0]])))
+        else:
+            merged.append(r)
+    return merged, f"완료 항목 {len(targets)}건을 {len(by_day)}일 단위로 합침"
+
+
+def _shorten_template(template: str, max_tokens: int):
+    """템플릿은 제목(#) 줄과 각 제목 바로 아래 한 줄만 남기고, 그래도 길면 앞부분만 남깁니다."""
+    lines = template.splitlines()
+    kept = []
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("#"):
+            kept.append(line)
+            if i + 1 < len(lines) and lines[i + 1].strip() and not lines[i + 1].lstrip().startswith("#"):
+                kept.append(lines[i + 1])
+    shortened = "\n".join(kept) if kept else template
+    if estimate_tokens(shortened) > max_tokens:
+        shortened = _truncate(shortened, max_tokens)
+    return shortened
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # 토큰 추정이 글자 수에 비례하므로 비율로 자르고, 반올림 오차는 몇 글자씩 더 줄여 맞춥니다.
+    ratio = max(0, max_tokens - estimate_tokens(_TRUNCATED_MARK)) / max(1, estimate_tokens(text))
+    cut = int(len(text) * ratio)
+    while cut > 0 and estimate_tokens(text[:cut] + _TRUNCATED_MARK) > max_tokens:
+        cut -= max(1, cut // 100)
+    return text[:max(0, cut)] + _TRUNCATED_MARK
+
+
+def fit_prompt_sections(todos, kpi_summary: str, template: str = None, budget: int = None):
+    """
+    할 일/KPI 요약/템플릿의 토큰 수를 재고, 예산을 넘으면 우선순위대로 줄입니다.
+      1) 저영향(low) 업무를 상태별로 묶기
+      2) 완료 항목을 날짜별로 합치기
+      3) 템플릿을 제목 위주로 줄이기
+      4) 그래도 넘으면 남은 예산을 할 일/KPI 요약 크기에 비례해 나누고 각각 뒷부분 잘라내기
+         (할 일 목록은 보고서의 주 입력이므로 남은 예산의 PROMPT_TODO_MIN_SHARE 이상을 보장)
+    Returns:
+        tuple: (todos 텍스트, kpi_summary, template, report)
+        report = {"budget", "initial_tokens", "final_tokens", "sections", "applied": [...], "over_budget"}
+    """
+    budget = int(budget or PROMPT_TOKEN_BUDGET)
+    template = template or ""
+    kpi_summary = kpi_summary or ""
+
+    tasks = parse_todos(todos)
+    rows = [task_row(t) for t in sorted(tasks, key=lambda x: x.get("date") or "")] if tasks is not None else None
+    todos_text = encode_rows(rows) if rows is not None else str(todos or "")
+
+    def measure():
+        return {
+            "todos": estimate_tokens(todos_text),
+            "kpi_summary": estimate_tokens(kpi_summary),
+            "template": estimate_tokens(template),
+        }
+
+    sections = measure()
+    initial = sum(sections.values())
+    applied = []
+
+    steps = []
+    if rows is not None:
+        steps += [_group_low_impact, _compress_done_by_day]
+    for step in steps:
+        if sum(measure().values()) <= budget:
+            break
+        rows, note = step(rows)
+        if note:
+            todos_text = encode_rows(rows)
+            applied.append(note)
+
+    if sum(measure().values()) > budget and template:
+        # 템플릿에는 남은 예산의 절반까지만 허용
+        remaining = budget - estimate_tokens(todos_text) - estimate_tokens(kpi_summary)
+        shortened = _shorten_template(template, max(200, remaining // 2))
+        if shortened != template:
+            applied.append(f"템플릿 축약 ({estimate_tokens(template)} → {estimate_tokens(shortened)} 토큰)")
+            template = shortened
+
+    sections = measure()
+    if sum(sections.values()) > budget:
+        available = max(0, budget - sections["template"])
+        todo_tokens, kpi_tokens = sections["todos"], sections["kpi_summary"]
+        todo_floor = min(todo_tokens, int(available * PROMPT_TODO_MIN_SHARE))
+        if kpi_tokens <= available - todo_floor:
+            # KPI 요약이 할 일 최소 몫 옆에 다 들어가면 그대로 두고 할 일만 줄입니다.
+            kpi_allowed = kpi_tokens
+        else:
+            share = available * todo_tokens // max(1, todo_tokens + kpi_tokens)
+            kpi_allowed = available - max(todo_floor, share)
+        # 할 일이 몫보다 작으면 남는 예산은 KPI 요약이 씁니다.
+        todo_allowed = min(todo_tokens, available - kpi_allowed)
+        kpi_allowed = min(kpi_tokens, available - todo_allowed)
+        if todo_allowed < todo_tokens:
+            todos_text = _truncate(todos_text, todo_allowed)
+            applied.append(f"todos 뒷부분 잘라냄 ({todo_tokens} → {todo_allowed} 토큰)")
+        if kpi_allowed < kpi_tokens:
+            kpi_summary = _truncate(kpi_summary, kpi_allowed)
+            applied.append(f"kpi_summary 뒷부분 잘라냄 ({kpi_tokens} → {kpi_allowed} 토큰)")
+
+    sections = measure()
+    final = sum(sections.values())
+    report = {
+        "budget": budget,
+        "initial_tokens": initial,
+        "final_tokens": final,
+        "sections": sections,
+        "applied": applied,
+        "over_budget": final > budget,
+    }
+    if applied:
+        print(f"[prompt_budget] {initial} → {final} 토큰 (예산 {budget}): {', '.join(applied)}")
+    return todos_text, kpi_summary, template or None, report
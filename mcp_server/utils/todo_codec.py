@@ -0,0 +1,71 @@
+import json
+from .token_utils import estimate_tokens
+
+# 프롬프트에 넣을 할 일 목록의 압축 표현
+# - 첫 줄은 헤더, 이후 한 줄에 할 일 하나 (구분자 '|')
+# - id는 제외하고 날짜는 MM-DD로 줄입니다. (월은 프롬프트에 따로 들어갑니다)
+COMPACT_FIELDS = ("date", "status", "impact", "task")
+COMPACT_HEADER = "|".join(COMPACT_FIELDS)
+COMPACT_FORMAT_NOTE = "첫 줄은 헤더이고, 이후 한 줄에 할 일 하나입니다. date는 MM-DD 형식입니다."
+
+
+def _short_date(date) -> str:
+    if not isinstance(date, str):
+        return ""
+    day = date.split(" ")[0]
+    return day[5:10] if len(day) >= 10 else day
+
+
+def _cell(value) -> str:
+    return str(value or "").replace("\n", " ").replace("|", "/").strip()
+
+
+def task_row(task: dict) -> tuple:
+    return (
+        _short_date(task.get("date")),
+        _cell(task.get("status")),
+        _cell(task.get("impact")),
+        _cell(task.get("task")),
+    )
+
+
+def encode_rows(rows: list) -> str:
+    """(date, status, impact, task) 행 리스트를 헤더와 함께 압축 텍스트로 만듭니다."""
+    return "\n".join([COMPACT_HEADER] + ["|".join(r) for r in rows])
+
+
+def encode_todos_compact(tasks: list) -> str:
+    """task 리스트를 날짜순 압축 텍스트로 변환합니다."""
+    return encode_rows([task_row(t) for t in sorted(tasks, key=lambda x: x.get("date") or "")])
+
+
+def parse_todos(todos):
+    """
+    list 또는 JSON 문자열로 들어온 todos를 task 리스트로 바꿉니다.
+    이미 압축 텍스트 등 다른 형식이면 None을 반환합니다.
+    """
+    if isinstance(todos, list):
+        return [t for t in todos if isinstance(t, dict)]
+    if isinstance(todos, str) and todos.lstrip().startswith("["):
+        try:
+            data = json.loads(todos)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(data, list):
+            return [t for t in data if isinstance(t, dict)]
+    return None
+
+
+def to_prompt_todos(todos) -> str:
+    """generate_feedback 프롬프트용 todos 문자열. 구조화된 입력이면 압축 형식으로 바꿉니다."""
+    tasks = parse_todos(todos)
+    if tasks is None:
+        return todos if isinstance(todos, str) else str(todos)
+    return encode_todos_compact(tasks)
+
+
+def compare_token_cost(tasks: list) -> dict:
+    """압축 형식과 기존 JSON(indent=2) 형식의 예상 토큰 수를 비교합니다."""
+    compact = estimate_tokens(encode_todos_compact(tasks))
+    pretty = estimate_tokens(json.dumps(tasks, ensure_ascii=False, indent=2))
+    return {"compact_tokens": compact, "json_tokens": pretty}
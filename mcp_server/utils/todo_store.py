@@ -0,0 +1,750 @@
+import os
+import re
+import json
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 할 일 저장소
+# GUI(gui_app.py), modules/data_utils.py, list_todos 툴이 모두 이 API를 통해 할 일을 읽고 씁니다.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TODO_DIR = os.path.normpath(os.path.join(BASE_DIR, "../../storage/todos"))
+TODO_DB = os.path.join(TODO_DIR, "todos.sqlite3")
+# 월별 JSON 파티션 디렉터리 (json 백엔드)
+TODO_PARTITION_DIR = os.path.join(TODO_DIR, "months")
+# 이전 버전에서 사용하던 단일 JSON 파일 (최초 실행 시 한 번만 가져옵니다)
+LEGACY_TODO_FILE = os.path.join(TODO_DIR, "todo_list.json")
+# 이전 버전의 월 이름 JSON 파일 (예: storage/todos/2025-09.json). 항목에 date가 없어 파일 이름의 달 1일로 가져옵니다.
+_LEGACY_MONTH_FILE = re.compile(r"^(\d{4}-\d{2})\.json$")
+
+# 사용할 저장소 백엔드: "sqlite"(기본) 또는 "json"(월별 파티션 파일)
+TODO_STORE_BACKEND = os.getenv("TODO_STORE_BACKEND", "sqlite")
+# json 백엔드: 저널 기록이 이만큼 쌓이면 월별 파일로 합칩니다.
+TODO_JOURNAL_COMPACT_EVERY = int(os.getenv("TODO_JOURNAL_COMPACT_EVERY", "200"))
+
+# 컬럼으로 저장하는 필드. 그 외 키는 extra(JSON)에 보관합니다.
+_COLUMNS = ("id", "task", "status", "impact", "date")
+
+
+def _month_of(date) -> str:
+    return date[:7] if isinstance(date, str) and len(date) >= 7 else ""
+
+
+def flatten_legacy_tasks(data) -> list:
+    """
+    JSON 파일 내용을 평평한 task 리스트로 변환합니다.
+    과거 주차별 구조([{"week": ..., "tasks": [...]}, ...])도 처리합니다.
+    """
+    if not isinstance(data, list):
+        return []
+    if data and isinstance(data[0], dict) and "week" in data[0]:
+        flat = []
+        for wk in data:
+            if isinstance(wk, dict) and isinstance(wk.get("tasks"), list):
+                flat.extend(wk["tasks"])
+        data = flat
+    return [t for t in data if isinstance(t, dict)]
+
+
+def _as_list(value):
+    """'done,pending' 같은 쉼표 구분 문자열이나 리스트를 리스트로 맞춥니다."""
+    if value is None or value == "" or value == []:
+        return None
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return list(value)
+
+
+def legacy_month_files(todo_dir: str = TODO_DIR) -> list:
+    """todo_dir의 월 이름 JSON 파일을 [(경로, 'YYYY-MM'), ...]로 이름순 반환합니다."""
+    if not todo_dir or not os.path.isdir(todo_dir):
+        return []
+    files = []
+    for name in sorted(os.listdir(todo_dir)):
+        m = _LEGACY_MONTH_FILE.match(name)
+        if m:
+            files.append((os.path.join(todo_dir, name), m.group(1)))
+    return files
+
+
+def legacy_task_id(source: str, position: int, task: dict) -> str:
+    """
+    id가 없는 옛 항목에 붙일 id. 파일 이름, 파일 내 위치, 내용으로 정해지므로
+    같은 파일을 여러 번(또는 여러 프로세스가 동시에) 가져와도 같은 id가 되어 중복이 생기지 않습니다.
+    """
+    content = json.dumps(task, ensure_ascii=False, sort_keys=True)
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"todo:{os.path.basename(source)}:{position}:{content}"))
+
+
+def _with_ids(source: str, tasks: list) -> list:
+    return [t if t.get("id") else dict(t, id=legacy_task_id(source, i, t)) for i, t in enumerate(tasks)]
+
+
+def sort_key(task: dict) -> tuple:
+    """목록 정렬/커서 기준: (날짜, id). 최신순은 이 키의 내림차순입니다."""
+    return (task.get("date") or "", task.get("id") or "")
+
+
+def filter_tasks(tasks, status=None, impact=None, date_from: str = None, date_to: str = None,
+                 after=None, limit: int = None) -> list:
+    """
+    메모리에 올라온 task 리스트에 query() 조건을 적용합니다.
+    date_from/date_to는 'YYYY-MM-DD'(양 끝 포함), after는 직전 페이지 마지막 항목의 sort_key입니다.
+    """
+    statuses, impacts = _as_list(status), _as_list(impact)
+    after = tuple(after) if after else None
+    result = []
+    for t in sorted(tasks, key=sort_key, reverse=True):
+        day = (t.get("date") or "")[:10]
+        if statuses and t.get("status") not in statuses:
+            continue
+        if impacts and t.get("impact") not in impacts:
+            continue
+        if date_from and day < date_from:
+            continue
+        if date_to and (not day or day > date_to):
+            continue
+        if after and sort_key(t) >= after:
+            continue
+        result.append(t)
+        if limit and len(result) >= limit:
+            break
+    return result
+
+
+class SqliteTodoStore:
+    """
+    SQLite 기반 할 일 저장소.
+    - id는 PRIMARY KEY, 월(YYYY-MM)은 인덱스 컬럼으로 저장해 월별 조회를 인덱스로 처리합니다.
+    - 단건 변경(add/update/delete)은 해당 행만 씁니다.
+    - 모든 쓰기는 meta.version을 올리므로, 호출 측은 version()으로 변경 여부를 싸게 확인할 수 있습니다.
+    """
+
+    def __init__(self, db_path: str = TODO_DB, legacy_file: str = LEGACY_TODO_FILE, legacy_dir: str = TODO_DIR):
+        self.db_path = db_path
+        self.legacy_file = legacy_file
+        self.legacy_dir = legacy_dir
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        """트랜잭션(성공 시 커밋, 오류 시 롤백)으로 감싼 연결. 블록이 끝나면 연결을 닫습니다."""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS todos (
+                    id TEXT PRIMARY KEY,
+                    task TEXT,
+                    status TEXT,
+                    impact TEXT,
+                    date TEXT,
+                    month TEXT NOT NULL DEFAULT '',
+                    extra TEXT
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_todos_month_date ON todos(month, date)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', '0')")
+
+        # 여러 프로세스가 동시에 시작해도 한 곳만 가져오도록, 확인/가져오기/표시를 한 쓰기 트랜잭션에서 합니다.
+        with self._transaction() as conn:
+            if not conn.execute("SELECT value FROM meta WHERE key = 'migrated'").fetchone():
+                count = 0
+                if self.legacy_file and os.path.exists(self.legacy_file):
+                    count = self._import_json(conn, self.legacy_file)
+                    print(f"[todo_store] {self.legacy_file}에서 {count}건을 가져왔습니다.")
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', ?)", (str(count),))
+            # 월 이름 파일은 파일마다 따로 표시해, 이미 todo_list.json을 가져온 DB에도 한 번씩 가져옵니다.
+            for path, month in legacy_month_files(self.legacy_dir):
+                key = f"migrated:{os.path.basename(path)}"
+                if conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                    continue
+                count = self._import_json(conn, path, default_month=month)
+                print(f"[todo_store] {path}에서 {count}건을 {month}월 항목으로 가져왔습니다.")
+                conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, str(count)))
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡는 트랜잭션. 끝나면 커밋(오류 시 롤백)하고 연결을 닫습니다."""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    # ---- 내부 변환 ----
+    @staticmethod
+    def _to_row(task: dict) -> tuple:
+        extra = {k: v for k, v in task.items() if k not in _COLUMNS}
+        return (
+            task["id"],
+            task.get("task"),
+            task.get("status"),
+            task.get("impact"),
+            task.get("date"),
+            _month_of(task.get("date")),
+            json.dumps(extra, ensure_ascii=False) if extra else None,
+        )
+
+    @staticmethod
+    def _from_row(row) -> dict:
+        task = {k: row[k] for k in _COLUMNS if row[k] is not None}
+        if row["extra"]:
+            task.update(json.loads(row["extra"]))
+        return task
+
+    @staticmethod
+    def _bump_version(conn) -> None:
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'")
+
+    def _upsert(self, conn, task: dict) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO todos (id, task, status, impact, date, month, extra) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._to_row(task),
+        )
+
+    # ---- 조회 ----
+    def version(self) -> int:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def list_months(self) -> list:
+        """할 일이 있는 월 목록(YYYY-MM, 최신순)."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT month FROM todos WHERE month != '' ORDER BY month DESC").fetchall()
+        return [r[0] for r in rows]
+
+    def list_tasks(self, month: str = None) -> list:
+        """month(YYYY-MM)가 주어지면 해당 월만, 아니면 전체를 날짜 최신순으로 반환합니다."""
+        with self._connect() as conn:
+            if month:
+                rows = conn.execute("SELECT * FROM todos WHERE month = ? ORDER BY date DESC", (month,)).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM todos ORDER BY date DESC").fetchall()
+        return [self._from_row(r) for r in rows]
+
+    def query(self, month: str = None, status=None, impact=None, date_from: str = None, date_to: str = None,
+              after=None, limit: int = None) -> list:
+        """
+        조건에 맞는 할 일을 (날짜, id) 내림차순으로 반환합니다. 필터는 모두 SQL로 처리합니다.
+        - status/impact: 값 하나, 리스트, 또는 쉼표 구분 문자열
+        - date_from/date_to: 'YYYY-MM-DD' (양 끝 포함)
+        - after: 직전 페이지 마지막 항목의 sort_key (키셋 페이지네이션)
+        """
+        where, params = [], []
+        if month:
+            where.append("month = ?")
+            params.append(month)
+        if date_from:
+            # month 조건을 함께 걸어 (month, date) 인덱스를 타도록 합니다.
+            where.append("month >= ? AND substr(date, 1, 10) >= ?")
+            params += [date_from[:7], date_from]
+        if date_to:
+            where.append("month != '' AND month <= ? AND substr(date, 1, 10) <= ?")
+            params += [date_to[:7], date_to]
+        for column, values in (("status", _as_list(status)), ("impact", _as_list(impact))):
+            if values:
+                where.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params += values
+        if after:
+            where.append("(COALESCE(date, ''), id) < (?, ?)")
+            params += list(after)
+
+        sql = "SELECT * FROM todos"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY COALESCE(date, '') DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._from_row(r) for r in rows]
+
+    def get(self, task_id: str, month: str = None):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM todos WHERE id = ?", (task_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    # ---- 변경 ----
+    def add(self, task: dict) -> dict:
+        task = dict(task)
+        task.setdefault("id", str(uuid.uuid4()))
+        with self._connect() as conn:
+            self._upsert(conn, task)
+            self._bump_version(conn)
+        return task
+
+    def update(self, task_id: str, fields: dict, month: str = None):
+        """task_id 항목에 fields를 덮어씁니다. 없으면 None. (month 힌트는 인덱스 조회라 사용하지 않습니다)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM todos WHERE id = ?", (task_id,)).fetchone()
+            if not row:
+                return None
+            task = self._from_row(row)
+            task.update(fields)
+            task["id"] = task_id
+            self._upsert(conn, task)
+            self._bump_version(conn)
+        return task
+
+    def delete(self, task_id: str, month: str = None) -> bool:
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM todos WHERE id = ?", (task_id,)).rowcount
+            if deleted:
+                self._bump_version(conn)
+        return bool(deleted)
+
+    def replace_all(self, tasks: list) -> None:
+        """전체 목록을 교체합니다. (이전 save_all_tasks 호환용)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM todos")
+            for t in tasks:
+                if isinstance(t, dict):
+                    t.setdefault("id", str(uuid.uuid4()))
+                    self._upsert(conn, t)
+            self._bump_version(conn)
+
+    # ---- 마이그레이션 ----
+    def migrate_from_json(self, path: str, default_month: str = None) -> int:
+        """
+        JSON 파일의 할 일을 저장소로 가져옵니다. 같은 id는 덮어씁니다.
+        default_month(YYYY-MM)를 주면 date가 없는 항목은 그 달 1일로 기록합니다.
+        (storage/todos/YYYY-MM.json 파일은 시작할 때 파일 이름의 달로 자동으로 가져옵니다.)
+        """
+        with self._transaction() as conn:
+            return self._import_json(conn, path, default_month)
+
+    def _import_json(self, conn, path: str, default_month: str = None) -> int:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                tasks = _with_ids(path, flatten_legacy_tasks(json.load(f)))
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[todo_store] 마이그레이션 실패({path}): {e}")
+            return 0
+
+        for t in tasks:
+            if default_month and not t.get("date"):
+                t = dict(t, date=f"{default_month}-01")
+            self._upsert(conn, t)
+        self._bump_version(conn)
+        return len(tasks)
+
+
+def _lock_file(f) -> None:
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    # msvcrt.LK_LOCK은 10초만 기다리고 실패하므로 잠길 때까지 다시 시도합니다.
+    while True:
+        try:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock_file(f) -> None:
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class PartitionedJsonTodoStore:
+    """
+    월별 JSON 파일 저장소.
+    - storage/todos/months/YYYY-MM.json 에 해당 월의 할 일만 저장합니다. (날짜 없는 항목은 _undated.json)
+    - manifest.json 에 월별 건수와 쓰기 버전을 기록해, 월 목록은 manifest만 읽고 얻습니다.
+    - 추가/수정/삭제는 journal.log 에 한 줄씩 덧붙이기만 하고(append-only),
+      일정 건수가 쌓이면 월별 파일로 합쳐(compaction) 원자적으로 교체한 뒤 저널을 비웁니다.
+    - 읽을 때는 월별 파일 위에 아직 합쳐지지 않은 저널 기록을 겹쳐 보여줍니다.
+    - GUI(Streamlit)와 MCP 서버(uvicorn)가 같은 파일을 함께 쓰므로, 저널 재생/잘라내기/추가와 compaction은
+      스레드 락과 함께 .lock 파일의 OS 락(flock) 안에서 수행합니다.
+    """
+
+    UNDATED = "_undated"
+
+    def __init__(self, partition_dir: str = TODO_PARTITION_DIR, legacy_file: str = LEGACY_TODO_FILE,
+                 compact_every: int = None, legacy_dir: str = TODO_DIR):
+        self.partition_dir = partition_dir
+        self.legacy_dir = legacy_dir
+        self.manifest_path = os.path.join(partition_dir, "manifest.json")
+        self.journal_path = os.path.join(partition_dir, "journal.log")
+        self.lock_path = os.path.join(partition_dir, ".lock")
+        self.legacy_file = legacy_file
+        self.compact_every = compact_every or TODO_JOURNAL_COMPACT_EVERY
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_fh = None
+        self._manifest_cache = None  # ((mtime_ns, size), manifest)
+        # 저널 재생 상태: 읽은 바이트 위치, 기록 수, 마지막 버전, {파티션 키: {id: task 또는 None(삭제)}}
+        self._journal_offset = 0
+        self._journal_count = 0
+        self._journal_version = None
+        self._overlay = {}
+        self._base_version = None  # 저널을 재생하기 시작한 시점의 manifest 버전
+        os.makedirs(partition_dir, exist_ok=True)
+
+        with self._locked():
+            if not os.path.exists(self.manifest_path):
+                self._write_manifest({"version": 0, "months": {}})
+                if self.legacy_file and os.path.exists(self.legacy_file):
+                    count = self.migrate_from_json(self.legacy_file)
+                    print(f"[todo_store] {self.legacy_file}에서 {count}건을 월별 파일로 나눠 저장했습니다.")
+            # 월 이름 파일은 가져온 파일 이름을 manifest의 imported에 기록해 한 번씩만 가져옵니다.
+            for path, month in legacy_month_files(self.legacy_dir):
+                name = os.path.basename(path)
+                if name in self._read_manifest().get("imported", []):
+                    continue
+                count = self.migrate_from_json(path, default_month=month)
+                manifest = dict(self._read_manifest())
+                manifest["imported"] = sorted(set(manifest.get("imported", [])) | {name})
+                self._write_manifest(manifest)
+                print(f"[todo_store] {path}에서 {count}건을 {month}월 항목으로 가져왔습니다.")
+            self._refresh_journal()
+
+    @contextmanager
+    def _locked(self):
+        """스레드 락 + 프로세스 간 파일 락. 같은 스레드에서 중첩 호출해도 파일 락은 한 번만 잡습니다."""
+        with self._lock:
+            if self._lock_depth == 0:
+                fh = open(self.lock_path, "a+b")
+                try:
+                    _lock_file(fh)
+                except BaseException:
+                    fh.close()
+                    raise
+                self._lock_fh = fh
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fh, self._lock_fh = self._lock_fh, None
+                    _unlock_file(fh)
+                    fh.close()
+
+    # ---- 파일 입출력 ----
+    @staticmethod
+    def _atomic_write_json(path: str, data) -> None:
+        # 임시 파일에 쓰고 디스크에 반영한 뒤 교체하므로, 중간에 중단돼도 이전 파일이 그대로 남습니다.
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _partition_key(self, month: str) -> str:
+        return month or self.UNDATED
+
+    def _partition_path(self, key: str) -> str:
+        return os.path.join(self.partition_dir, f"{key}.json")
+
+    def _read_manifest(self) -> dict:
+        try:
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return {"version": 0, "months": {}}
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._manifest_cache and self._manifest_cache[0] == stamp:
+            return self._manifest_cache[1]
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._manifest_cache = (stamp, manifest)
+        return manifest
+
+    def _write_manifest(self, manifest: dict) -> None:
+        self._atomic_write_json(self.manifest_path, manifest)
+        self._manifest_cache = None
+
+    def _read_snapshot(self, key: str) -> list:
+        path = self._partition_path(key)
+        if not os.path.exists(path):
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return flatten_legacy_tasks(json.load(f))
+        except (json.JSONDecodeError, OSError):
+            return []
+
+    def _read_partition(self, key: str) -> list:
+        """월별 파일 + 저널 기록을 합친 현재 상태."""
+        tasks = self._read_snapshot(key)
+        changes = self._overlay.get(key)
+        if not changes:
+            return tasks
+        merged = [changes[t.get("id")] if t.get("id") in changes else t for t in tasks]
+        merged = [t for t in merged if t is not None]
+        existing = {t.get("id") for t in tasks}
+        merged.extend(t for tid, t in changes.items() if t is not None and tid not in existing)
+        return merged
+
+    # ---- 저널 ----
+    def _apply_record(self, record: dict) -> None:
+        op = record.get("op")
+        if op == "upsert":
+            task = record["task"]
+            key = self._partition_key(_month_of(task.get("date")))
+            source = record.get("from")
+            if source is not None and source != key:
+                self._overlay.setdefault(source, {})[task["id"]] = None
+            self._overlay.setdefault(key, {})[task["id"]] = task
+        elif op == "delete":
+            self._overlay.setdefault(record["month"], {})[record["id"]] = None
+        self._journal_count += 1
+        self._journal_version = record.get("v", self._journal_version)
+
+    def _refresh_journal(self) -> None:
+        """저널에서 아직 읽지 않은 부분만 이어서 재생합니다."""
+        with self._locked():
+            try:
+                size = os.path.getsize(self.journal_path)
+            except FileNotFoundError:
+                size = 0
+            base_version = self._read_manifest().get("version", 0)
+            if size < self._journal_offset or base_version != self._base_version:
+                # 다른 프로세스가 compaction 했으면 처음부터 다시 읽습니다.
+                self._journal_offset, self._journal_count = 0, 0
+                self._journal_version, self._overlay = None, {}
+                self._base_version = base_version
+            if size == self._journal_offset:
+                return
+
+            with open(self.journal_path, "rb") as f:
+                f.seek(self._journal_offset)
+                data = f.read(size - self._journal_offset)
+            # 마지막 줄이 개행 없이 끊겨 있으면(쓰기 중 중단) 완성될 때까지 건너뜁니다.
+            complete = data[:data.rfind(b"\n") + 1]
+            for line in complete.splitlines():
+                try:
+                    self._apply_record(json.loads(line))
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+            self._journal_offset += len(complete)
+
+    def _append(self, record: dict) -> None:
+        with self._locked():
+            self._refresh_journal()
+            record["v"] = self.version() + 1
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > self._journal_offset:
+                # 이전 쓰기가 중단되며 남긴 미완성 줄을 잘라낸 뒤 이어 씁니다.
+                os.truncate(self.journal_path, self._journal_offset)
+            with open(self.journal_path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_offset += len(line)
+            self._apply_record(record)
+            if self._journal_count >= self.compact_every:
+                self.compact()
+
+    def compact(self) -> None:
+        """저널 기록을 월별 파일에 합치고 저널을 비웁니다."""
+        with self._locked():
+            self._refresh_journal()
+            if not self._journal_count:
+                return
+            partitions = {key: self._read_partition(key) for key in self._overlay}
+            self._write_partitions(partitions, version=self.version())
+            # 월별 파일과 manifest가 모두 교체된 뒤에만 저널을 비웁니다.
+            # 그 사이에 중단되어도 저널 재생은 같은 결과를 다시 만들 뿐입니다.
+            open(self.journal_path, "wb").close()
+            self._journal_offset, self._journal_count = 0, 0
+            self._journal_version, self._overlay = None, {}
+            self._base_version = self._read_manifest().get("version", 0)
+
+    def _write_partitions(self, partitions: dict, version: int = None) -> None:
+        """{파티션 키: task 리스트}를 월별 파일로 기록하고 manifest의 건수/버전을 갱신합니다."""
+        manifest = dict(self._read_manifest())
+        months = dict(manifest.get("months", {}))
+        for key, tasks in partitions.items():
+            path = self._partition_path(key)
+            if tasks:
+                self._atomic_write_json(path, tasks)
+                months[key] = len(tasks)
+            else:
+                if os.path.exists(path):
+                    os.remove(path)
+                months.pop(key, None)
+        manifest["months"] = months
+        manifest["version"] = version if version is not None else int(manifest.get("version", 0)) + 1
+        self._write_manifest(manifest)
+
+    def _find(self, task_id: str, month: str = None):
+        """(파티션 키, 파티션 내용, 인덱스)를 반환합니다. month 힌트가 있으면 그 달부터 찾습니다."""
+        keys = list(dict.fromkeys(list(self._read_manifest().get("months", {})) + list(self._overlay)))
+        if month is not None:
+            hint = self._partition_key(month)
+            keys = [hint] + [k for k in keys if k != hint]
+        for key in keys:
+            tasks = self._read_partition(key)
+            for i, t in enumerate(tasks):
+                if t.get("id") == task_id:
+                    return key, tasks, i
+        return None, None, None
+
+    # ---- 조회 ----
+    def version(self) -> int:
+        self._refresh_journal()
+        if self._journal_version is not None:
+            return self._journal_version
+        return int(self._read_manifest().get("version", 0))
+
+    def _partition_keys(self) -> list:
+        """내용이 있는 파티션 키 목록. 저널로 바뀐 달만 실제로 읽어 확인합니다."""
+        self._refresh_journal()
+        keys = set(self._read_manifest().get("months", {}))
+        for key in self._overlay:
+            if self._read_partition(key):
+                keys.add(key)
+            else:
+                keys.discard(key)
+        return list(keys)
+
+    def list_months(self) -> list:
+        return sorted((m for m in self._partition_keys() if m != self.UNDATED), reverse=True)
+
+    def list_tasks(self, month: str = None) -> list:
+        self._refresh_journal()
+        if month:
+            tasks = self._read_partition(self._partition_key(month))
+        else:
+            tasks = []
+            for key in self._partition_keys():
+                tasks.extend(self._read_partition(key))
+        return sorted(tasks, key=lambda t: t.get("date") or "", reverse=True)
+
+    def query(self, month: str = None, status=None, impact=None, date_from: str = None, date_to: str = None,
+              after=None, limit: int = None) -> list:
+        """SqliteTodoStore.query와 같은 조건. 조건에 걸리는 달의 파일만 읽습니다."""
+        self._refresh_journal()
+        if month:
+            keys = [self._partition_key(month)]
+        else:
+            keys = self._partition_keys()
+            if date_from:
+                keys = [k for k in keys if k != self.UNDATED and k >= date_from[:7]]
+            if date_to:
+                keys = [k for k in keys if k != self.UNDATED and k <= date_to[:7]]
+        tasks = [t for key in keys for t in self._read_partition(key)]
+        return filter_tasks(tasks, status, impact, date_from, date_to, after, limit)
+
+    def get(self, task_id: str, month: str = None):
+        self._refresh_journal()
+        _, tasks, i = self._find(task_id, month)
+        return dict(tasks[i]) if tasks is not None else None
+
+    # ---- 변경 ----
+    def add(self, task: dict) -> dict:
+        task = dict(task)
+        task.setdefault("id", str(uuid.uuid4()))
+        self._append({"op": "upsert", "task": task})
+        return task
+
+    def update(self, task_id: str, fields: dict, month: str = None):
+        """task_id 항목에 fields를 덮어씁니다. 날짜가 다른 달로 바뀌면 파티션을 옮깁니다."""
+        with self._locked():
+            self._refresh_journal()
+            key, tasks, i = self._find(task_id, month)
+            if tasks is None:
+                return None
+            task = dict(tasks[i])
+            task.update(fields)
+            task["id"] = task_id
+            self._append({"op": "upsert", "task": task, "from": key})
+        return task
+
+    def delete(self, task_id: str, month: str = None) -> bool:
+        with self._locked():
+            self._refresh_journal()
+            key, tasks, _ = self._find(task_id, month)
+            if tasks is None:
+                return False
+            self._append({"op": "delete", "id": task_id, "month": key})
+        return True
+
+    def replace_all(self, tasks: list) -> None:
+        """전체 목록을 교체합니다. 저널을 거치지 않고 바로 월별 파일로 기록합니다."""
+        with self._locked():
+            self.compact()
+            partitions = {key: [] for key in self._read_manifest().get("months", {})}
+            for t in tasks:
+                if isinstance(t, dict):
+                    t.setdefault("id", str(uuid.uuid4()))
+                    partitions.setdefault(self._partition_key(_month_of(t.get("date"))), []).append(t)
+            self._write_partitions(partitions)
+
+    # ---- 마이그레이션 ----
+    def migrate_from_json(self, path: str, default_month: str = None) -> int:
+        """JSON 파일의 할 일을 월별 파일로 나눠 가져옵니다. 같은 id는 덮어씁니다."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                incoming = _with_ids(path, flatten_legacy_tasks(json.load(f)))
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[todo_store] 마이그레이션 실패({path}): {e}")
+            return 0
+
+        with self._locked():
+            self.compact()
+            partitions = {}
+            for t in incoming:
+                t = dict(t)
+                if default_month and not t.get("date"):
+                    t["date"] = f"{default_month}-01"
+                key = self._partition_key(_month_of(t.get("date")))
+                if key not in partitions:
+                    partitions[key] = self._read_snapshot(key)
+                partitions[key] = [x for x in partitions[key] if x.get("id") != t["id"]] + [t]
+            if partitions:
+                self._write_partitions(partitions)
+        return len(incoming)
+
+
+_BACKENDS = {
+    "sqlite": SqliteTodoStore,
+    "json": PartitionedJsonTodoStore,
+}
+
+_store = None
+
+
+def get_store():
+    """프로세스 전역 저장소 인스턴스를 반환합니다. 백엔드는 TODO_STORE_BACKEND로 선택합니다."""
+    global _store
+    if _store is None:
+        if TODO_STORE_BACKEND not in _BACKENDS:
+            raise ValueError(f"지원하지 않는 TODO_STORE_BACKEND입니다: {TODO_STORE_BACKEND}")
+        _store = _BACKENDS[TODO_STORE_BACKEND]()
+    return _store
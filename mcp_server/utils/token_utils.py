@@ -0,0 +1,59 @@
+import math
+
+# 토크나이저 없이 쓰는 대략적인 토큰 수 추정치
+# - ASCII(영문/숫자/기호): 약 4글자당 1토큰
+# - 그 외(한글 등): 약 1.5글자당 1토큰
+_ASCII_CHARS_PER_TOKEN = 4
+_OTHER_CHARS_PER_TOKEN = 1.5
+
+# 청크 분할 시 우선 시도하는 경계: 페이지 → 문단 → 줄
+_SEPARATORS = ["\f", "\n\n", "\n"]
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    other_chars = len(text) - ascii_chars
+    return math.ceil(ascii_chars / _ASCII_CHARS_PER_TOKEN + other_chars / _OTHER_CHARS_PER_TOKEN)
+
+
+def _hard_split(text: str, max_tokens: int) -> list:
+    # 경계가 없는 긴 덩어리는 글자 수 기준으로 자릅니다 (보수적으로 한글 기준).
+    size = max(1, int(max_tokens * _OTHER_CHARS_PER_TOKEN))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _split_units(text: str, max_tokens: int, level: int = 0) -> list:
+    """max_tokens 이하가 될 때까지 더 작은 경계로 나눈 조각 리스트를 반환합니다."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    if level >= len(_SEPARATORS):
+        return _hard_split(text, max_tokens)
+
+    sep = _SEPARATORS[level]
+    units = []
+    for part in text.split(sep):
+        if part.strip():
+            units.extend(_split_units(part, max_tokens, level + 1))
+    return units
+
+
+def split_into_chunks(text: str, max_tokens: int) -> list:
+    """
+    텍스트를 max_tokens 이하의 청크로 나눕니다.
+    페이지/문단/줄 경계를 유지하면서 인접한 조각을 예산 안에서 최대한 합칩니다.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for unit in _split_units(text, max_tokens):
+        unit_tokens = estimate_tokens(unit)
+        if current and current_tokens + unit_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += unit_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
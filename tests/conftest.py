@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def notion(tmp_path, monkeypatch):
+    """스텁 Notion 서버를 띄우고 export_to_notion이 그 서버와 임시 상태 파일을 쓰도록 바꿉니다."""
+    pytest.importorskip("notion_client")
+    pytest.importorskip("dotenv")
+    from tests.notion_stub import NotionStub
+    from mcp_server.utils import notion_api
+    from mcp_server.tools import export_to_notion
+
+    stub = NotionStub()
+    base_url = stub.start()
+    monkeypatch.setattr(notion_api, "NOTION_BASE_URL", base_url)
+    monkeypatch.setattr(notion_api, "NOTION_API_KEY", "test-key")
+    monkeypatch.setattr(notion_api, "NOTION_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(notion_api, "_bucket", notion_api.TokenBucket(1000, 100))
+    monkeypatch.setattr(notion_api, "_client", None)
+    monkeypatch.setattr(export_to_notion, "NOTION_API_KEY", "test-key")
+    monkeypatch.setattr(export_to_notion, "NOTION_PAGE_ID", "parent-page")
+    monkeypatch.setattr(export_to_notion, "EXPORT_STATE_FILE", str(tmp_path / "export_state.json"))
+    monkeypatch.setattr(export_to_notion, "SYNC_STATE_FILE", str(tmp_path / "sync_state.json"))
+    yield stub
+    stub.stop()
@@ -0,0 +1,182 @@
+"""
+테스트용 Notion API 스텁 서버.
+페이지/블록을 메모리에 두고 pages.create, blocks.children.list/append, blocks.update/delete를 흉내 냅니다.
+faults에 (HTTP 메서드, 경로 일부, 동작)을 넣으면 해당 요청 하나에 429/5xx 등을 돌려줍니다.
+동작: {"status": 코드, "headers": 응답 헤더, "apply": 반영 후 오류 응답(응답 유실), "after": 먼저 통과시킬 요청 수}
+"""
+import json
+import uuid
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class NotionStub:
+    def __init__(self):
+        self.children = {}   # page/block id -> [child id]
+        self.blocks = {}     # block id -> block
+        self.log = []        # (HTTP 메서드, 경로, 응답 코드)
+        self.faults = []     # [(method, path_part, 동작)]
+        self.lock = threading.Lock()
+        self._server = None
+
+    # ---- 서버 ----
+    def start(self) -> str:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                code, payload, headers = stub.dispatch(self.command, self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    # ---- 조회 도우미 ----
+    def page_text(self, page_id: str) -> list:
+        out = []
+        for bid in self.children[page_id]:
+            block = self.blocks[bid]
+            btype = block["type"]
+            out.append(f"{btype}:" + "".join(r["text"]["content"] for r in block[btype]["rich_text"]))
+        return out
+
+    def calls(self, method: str, path_part: str = "") -> int:
+        return sum(1 for m, p, _ in self.log if m == method and path_part in p)
+
+    def pages(self) -> list:
+        return [pid for pid in self.children if pid not in self.blocks]
+
+    def remove(self, block_id: str) -> None:
+        """Notion 화면에서 사용자가 블록(또는 페이지)을 하위 블록까지 지운 것처럼 만듭니다."""
+        with self.lock:
+            for ids in self.children.values():
+                if block_id in ids:
+                    ids.remove(block_id)
+            stack = [block_id]
+            while stack:
+                bid = stack.pop()
+                stack.extend(self.children.pop(bid, []))
+                self.blocks.pop(bid, None)
+
+    # ---- 요청 처리 ----
+    @staticmethod
+    def _rich_text(items: list) -> list:
+        # 실제 API처럼 plain_text와 전체 annotations를 채워 돌려줍니다.
+        out = []
+        for item in items:
+            annotations = {"bold": False, "italic": False, "strikethrough": False,
+                           "underline": False, "code": False, "color": "default"}
+            annotations.update(item.get("annotations") or {})
+            content = item["text"]["content"]
+            out.append({"type": "text", "text": {"content": content, "link": None},
+                        "annotations": annotations, "plain_text": content, "href": None})
+        return out
+
+    def _store(self, block_id: str, block: dict) -> dict:
+        btype = block["type"]
+        stored = {"object": "block", "id": block_id, "type": btype, "has_children": False, "archived": False,
+                  btype: dict(block[btype], rich_text=self._rich_text(block[btype].get("rich_text", [])))}
+        self.blocks[block_id] = stored
+        return stored
+
+    def _new_blocks(self, children: list) -> list:
+        ids = []
+        for child in children:
+            bid = str(uuid.uuid4())
+            self._store(bid, child)
+            self.children[bid] = []
+            ids.append(bid)
+        return ids
+
+    def _error(self, status: int, code: str = "internal_server_error"):
+        return {"object": "error", "status": status, "code": code, "message": f"stub {status}"}
+
+    def dispatch(self, method: str, path: str, body: dict):
+        with self.lock:
+            fault = None
+            for i, (m, part, action) in enumerate(self.faults):
+                if m == method and part in path:
+                    if action.get("after"):
+                        action["after"] -= 1
+                    else:
+                        fault = self.faults.pop(i)[2]
+                    break
+            if fault and not fault.get("apply"):
+                self.log.append((method, path, fault["status"]))
+                code = "rate_limited" if fault["status"] == 429 else "internal_server_error"
+                if fault["status"] == 400:
+                    code = "validation_error"
+                return fault["status"], self._error(fault["status"], code), fault.get("headers", {})
+
+            code, payload = self._apply(method, path, body)
+            if fault:
+                # 요청은 반영했지만 응답이 유실된 경우
+                code, payload = fault["status"], self._error(fault["status"])
+            self.log.append((method, path, code))
+            return code, payload, {}
+
+    def _apply(self, method: str, path: str, body: dict):
+        url = urlparse(path)
+        parts = url.path.strip("/").split("/")  # ["v1", "pages"] / ["v1", "blocks", id, "children"]
+        if method == "POST" and parts[1] == "pages":
+            page_id = str(uuid.uuid4())
+            self.children[page_id] = self._new_blocks(body.get("children", []))
+            return 200, {"object": "page", "id": page_id, "url": f"https://www.notion.so/{page_id.replace('-', '')}"}
+
+        block_id = parts[2]
+        if block_id not in self.children:
+            return 404, self._error(404, "object_not_found")
+
+        if method == "GET" and parts[-1] != "children":
+            return 200, self.blocks.get(block_id) or {"object": "block", "id": block_id, "type": "child_page", "archived": False}
+
+        if parts[-1] == "children":
+            ids = self.children[block_id]
+            if method == "GET":
+                query = parse_qs(url.query)
+                start = int(query.get("start_cursor", ["0"])[0])
+                size = int(query.get("page_size", ["100"])[0])
+                more = start + size < len(ids)
+                return 200, {"object": "list", "results": [self.blocks[b] for b in ids[start:start + size]],
+                             "has_more": more, "next_cursor": str(start + size) if more else None}
+            new_ids = self._new_blocks(body["children"])
+            pos = ids.index(body["after"]) + 1 if body.get("after") else len(ids)
+            ids[pos:pos] = new_ids
+            # 실제 API처럼 새 블록만 순서를 보장하지 않는 목록으로 돌려줍니다 (부모의 다른 자식도 섞일 수 있음).
+            results = [self.blocks[b] for b in ids[max(0, pos - 1):pos + len(new_ids) + 1]]
+            return 200, {"object": "list", "results": list(reversed(results))}
+
+        if method == "PATCH":
+            btype = self.blocks[block_id]["type"]
+            if btype not in body:
+                return 400, self._error(400, "validation_error")
+            return 200, self._store(block_id, {"type": btype, btype: body[btype]})
+        if method == "DELETE":
+            for ids in self.children.values():
+                if block_id in ids:
+                    ids.remove(block_id)
+            self.blocks.pop(block_id, None)
+            self.children.pop(block_id, None)
+            return 200, {"object": "block", "id": block_id, "archived": True}
+        return 400, self._error(400, "validation_error")
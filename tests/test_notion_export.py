@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+# 의존성이 없는 환경에서는 수집 단계에서 건너뜁니다. (export_to_notion import가 dotenv/notion_client를 요구)
+pytest.importorskip("dotenv")
+pytest.importorskip("notion_client")
+
+from mcp_server.tools import export_to_notion  # noqa: E402
+
+
+def _report(n: int) -> str:
+    return "\n".join(["# 보고서"] + [f"- 항목 {i}" for i in range(n)])
+
+
+def _expected(content: str) -> list:
+    return [
+        f"{b['type']}:" + "".join(r["text"]["content"] for r in b[b["type"]]["rich_text"])
+        for b in export_to_notion.markdown_to_blocks(content)
+    ]
+
+
+def _only_page(stub) -> str:
+    pages = stub.pages()
+    assert len(pages) == 1
+    return pages[0]
+
+
+def test_blocks_are_sent_in_batches_of_100(notion):
+    content = _report(249)  # 250 블록
+    res = export_to_notion.run("2026-10", content)
+
+    assert res["status"] == "success" and res["blocks"] == 250
+    assert notion.calls("POST", "/pages") == 1
+    assert notion.calls("PATCH", "/children") == 2
+    assert notion.page_text(_only_page(notion)) == _expected(content)
+
+
+def test_rate_limit_honours_retry_after(notion):
+    notion.faults += [("POST", "/pages", {"status": 429, "headers": {"Retry-After": "0.2"}})] * 2
+    started = time.monotonic()
+    res = export_to_notion.run("2026-10", _report(10))
+
+    assert res["status"] == "success"
+    assert time.monotonic() - started >= 0.4
+    assert [code for m, _, code in notion.log if m == "POST"] == [429, 429, 200]
+
+
+def test_failed_export_resumes_on_the_same_page(notion):
+    content = _report(349)
+    notion.faults.append(("PATCH", "/children", {"status": 400}))
+    assert export_to_notion.run("2026-10", content)["status"] == "error"
+
+    res = export_to_notion.run("2026-10", content)
+    assert res["status"] == "success"
+    assert notion.calls("POST", "/pages") == 1
+    assert notion.page_text(_only_page(notion)) == _expected(content)
+
+
+def test_writes_are_not_retried_on_server_errors(notion):
+    # 요청은 반영됐지만 응답이 504로 유실된 경우: 같은 블록을 다시 보내면 중복이 생깁니다.
+    content = _report(249)
+    notion.faults.append(("PATCH", "/children", {"status": 504, "apply": True}))
+    assert export_to_notion.run("2026-10", content)["status"] == "error"
+    assert notion.calls("PATCH", "/children") == 1
+
+    # 다시 내보내면 실제 페이지 블록 수를 확인해 빠진 부분만 보냅니다.
+    res = export_to_notion.run("2026-10", content)
+    assert res["status"] == "success"
+    assert notion.page_text(_only_page(notion)) == _expected(content)
+
+
+def test_page_create_is_not_retried_but_reads_are(notion):
+    notion.faults.append(("POST", "/pages", {"status": 502}))
+    assert export_to_notion.run("2026-10", _report(5))["status"] == "error"
+    assert notion.calls("POST", "/pages") == 1
+
+    # 조회는 반복해도 안전하므로 5xx에서 재시도합니다.
+    content = _report(149)
+    notion.faults.append(("PATCH", "/children", {"status": 400}))
+    export_to_notion.run("2026-10", content)
+    notion.faults.append(("GET", "/children", {"status": 503}))
+    assert export_to_notion.run("2026-10", content)["status"] == "success"
+    assert notion.calls("GET", "/children") == 2
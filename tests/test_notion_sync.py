@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+# 의존성이 없는 환경에서는 수집 단계에서 건너뜁니다. (export_to_notion import가 dotenv/notion_client를 요구)
+pytest.importorskip("dotenv")
+pytest.importorskip("notion_client")
+
+from mcp_server.tools import export_to_notion  # noqa: E402
+
+
+def _lines(n: int) -> list:
+    return ["# 보고서"] + [f"- 항목 {i}" for i in range(n)]
+
+
+def _sync(lines: list) -> dict:
+    res = export_to_notion.run("2026-10", "\n".join(lines), mode="sync")
+    return res
+
+
+def _expected(lines: list) -> list:
+    return [
+        f"{b['type']}:" + "".join(r["text"]["content"] for r in b[b["type"]]["rich_text"])
+        for b in export_to_notion.markdown_to_blocks("\n".join(lines))
+    ]
+
+
+def _assert_page_matches(stub, lines: list) -> str:
+    pages = stub.pages()
+    assert len(pages) == 1, "새 페이지가 만들어지면 안 됩니다"
+    assert stub.page_text(pages[0]) == _expected(lines)
+    return pages[0]
+
+
+def _assert_state_matches(stub, page_id: str) -> None:
+    with open(export_to_notion.SYNC_STATE_FILE, encoding="utf-8") as f:
+        saved = json.load(f)["2026-10"]["blocks"]
+    assert [b["id"] for b in saved] == stub.children[page_id]
+
+
+def test_first_sync_uploads_and_records_block_ids(notion):
+    lines = _lines(150)
+    res = _sync(lines)
+
+    assert res["status"] == "success" and res["created"] and res["inserted"] == 151
+    page_id = _assert_page_matches(notion, lines)
+    _assert_state_matches(notion, page_id)
+
+
+def test_one_line_edit_sends_one_update(notion):
+    lines = _lines(250)
+    _sync(lines)
+    notion.log.clear()
+
+    lines[10] = "- 항목 10 **수정됨**"
+    res = _sync(lines)
+
+    assert (res["inserted"], res["updated"], res["deleted"], res["unchanged"]) == (0, 1, 0, 250)
+    assert [m for m, _, _ in notion.log] == ["PATCH"]
+    _assert_page_matches(notion, lines)
+
+
+def test_insert_delete_and_type_change(notion):
+    lines = _lines(120)
+    _sync(lines)
+
+    lines.insert(50, "새 문단")
+    del lines[80:83]
+    lines[100] = "## 제목으로 바뀐 줄"
+    lines.append("- 마지막 항목")
+    res = _sync(lines)
+
+    assert (res["inserted"], res["updated"], res["deleted"]) == (3, 0, 4)
+    page_id = _assert_page_matches(notion, lines)
+    _assert_state_matches(notion, page_id)
+
+
+def test_inserted_block_ids_are_matched_by_content(notion):
+    # 스텁은 append 응답을 뒤집고 이웃 블록도 섞어 돌려줍니다. 꼬리 슬라이스로 ID를 고르면 다음 수정이 엉뚱한 블록에 갑니다.
+    lines = _lines(20)
+    _sync(lines)
+    lines[5:5] = ["- 추가 A", "- 추가 B", "- 추가 C"]
+    _sync(lines)
+
+    lines[6] = "- 추가 B (수정)"
+    res = _sync(lines)
+    assert res["updated"] == 1
+    page_id = _assert_page_matches(notion, lines)
+    _assert_state_matches(notion, page_id)
+
+
+def test_failure_inside_a_hunk_keeps_state_in_step_with_the_page(notion):
+    lines = _lines(60)
+    _sync(lines)
+
+    edited = [line for i, line in enumerate(lines) if not 10 <= i < 20]
+    # 한 구간(삭제 10건) 중 세 번째 삭제에서 실패
+    notion.faults.append(("DELETE", "/blocks/", {"status": 400, "after": 2}))
+    assert _sync(edited)["status"] == "error"
+    page_id = notion.pages()[0]
+    _assert_state_matches(notion, page_id)
+
+    res = _sync(edited)
+    assert res["status"] == "success" and not res["created"]
+    assert res["deleted"] == 8
+    _assert_page_matches(notion, edited)
+
+
+def test_lost_append_response_does_not_duplicate_blocks(notion):
+    lines = _lines(30)
+    _sync(lines)
+
+    lines[10:10] = ["- 추가 1", "- 추가 2"]
+    notion.faults.append(("PATCH", "/children", {"status": 504, "apply": True}))
+    assert _sync(lines)["status"] == "error"
+
+    res = _sync(lines)
+    assert res["status"] == "success" and res["inserted"] == 0
+    _assert_page_matches(notion, lines)
+
+
+def test_block_deleted_in_notion_resyncs_the_same_page(notion):
+    lines = _lines(30)
+    _sync(lines)
+    page_id = notion.pages()[0]
+    notion.remove(notion.children[page_id][5])  # "- 항목 4"를 Notion에서 직접 삭제
+
+    lines[5] = "- 항목 4 (수정)"
+    res = _sync(lines)
+    assert res["status"] == "success" and not res["created"]
+    assert notion.calls("POST", "/pages") == 1
+    _assert_page_matches(notion, lines)
+
+
+def test_deleted_page_falls_back_to_a_new_page(notion):
+    lines = _lines(10)
+    _sync(lines)
+    notion.remove(notion.pages()[0])
+
+    lines[3] = "- 바뀐 항목"
+    res = _sync(lines)
+    assert res["status"] == "success" and res["created"]
+    _assert_page_matches(notion, lines)